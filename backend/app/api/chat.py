@@ -1,75 +1,270 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from app.models.chat import ChatRequest, ChatResponse
 from app.services.llm_service import llm_service
 from app.services.rag_service import rag_service
+from app.services.answer_cache import answer_cache
+from app.services.conversation_memory import conversation_memory
 from app.db.postgres import postgres_client
+from app.db.message_writer import message_writer
+from app.core.timing import StageTimer
+from app.config import settings
 from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import json
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+async def _retrieve_context(request: ChatRequest) -> Tuple[List[str], List[str]]:
+    """Search the knowledge base and split hits into context and citations"""
+    context_results = []
+    citations = []
+    
+    if request.use_rag:
+        rag_results = await rag_service.search_knowledge(
+            query=request.message,
+            limit=settings.rag_top_k
+        )
+        
+        for result in rag_results:
+            context_results.append(result["content"])
+            citations.append(result["citation"])
+    
+    return context_results, citations
+
+def _cache_context(context_results: List[str], history: List[Dict[str, str]]) -> List[str]:
+    """Answer cache key material: RAG context plus prior turns, so follow-ups never reuse another session's answer"""
+    return context_results + [f"{turn['role']}: {turn['content']}" for turn in history]
+
+def _remember_turn(session_id: str, message: str, answer: str):
+    """Append a completed exchange to the in-process conversation window"""
+    conversation_memory.record(session_id, "user", message)
+    conversation_memory.record(session_id, "assistant", answer)
+
+def _cancel_pending(*tasks: Optional[asyncio.Task]):
+    """Cancel helper tasks a failed request leaves behind (and consume errors of finished ones)"""
+    for task in tasks:
+        if task is None:
+            continue
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            task.exception()
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a server-sent event frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
 @router.post("/message", response_model=ChatResponse)
-async def chat_message(request: ChatRequest):
+async def chat_message(request: ChatRequest, response: Response):
     """
     Send a message to Bitcoin ChatGPT and get AI response with citations
     
     This endpoint:
-    1. Searches Bitcoin knowledge base for relevant context (RAG)
-    2. Generates AI response using OpenAI with context
+    1. Searches Bitcoin knowledge base for relevant context (RAG), while
+       the user message is persisted and prior turns are loaded concurrently
+    2. Generates AI response using OpenAI with context and conversation
+       history (within the token budget), or reuses a cached
+       answer to a near-duplicate question (model_used="cache")
     3. Returns response with citations from Bitcoin sources
-    4. Saves conversation to database
+    4. Queues the conversation for batched persistence
+    
+    Per-stage durations are reported in the Server-Timing response header.
     """
+    timer = StageTimer()
+    started_at = datetime.now()
+    save_user = load_history = None
     try:
+        # Persist the user message concurrently with retrieval and generation
+        save_user = asyncio.create_task(timer.measure("persist_user", message_writer.save(
+            session_id=request.session_id,
+            role="user",
+            content=request.message
+        )))
+        
+        # Load prior turns of the session concurrently with retrieval
+        load_history = asyncio.create_task(timer.measure("history", conversation_memory.get_window(
+            request.session_id,
+            before=started_at
+        )))
+        
         # Search Bitcoin knowledge base for relevant context
-        context_results = []
-        citations = []
+        context_results, citations = await timer.measure("retrieval", _retrieve_context(request))
+        history = conversation_memory.pack(await load_history)
+        cache_context = _cache_context(context_results, history)
         
-        if request.use_rag:
-            rag_results = await rag_service.search_knowledge(
-                query=request.message,
-                limit=3
-            )
+        # Reuse a cached answer for near-duplicate questions with the same context
+        cached = None
+        if not request.bypass_cache:
+            cached = await timer.measure("cache", answer_cache.lookup(request.message, cache_context))
+        
+        if cached:
+            ai_response = cached.answer
+            citations = cached.citations
+            model_used = "cache"
+        else:
+            # Generate AI response with Bitcoin context
+            ai_response = await timer.measure("llm", llm_service.generate_response(
+                message=request.message,
+                context=context_results,
+                session_id=request.session_id,
+                history=history
+            ))
+            model_used = llm_service.last_model_used
             
-            for result in rag_results:
-                context_results.append(result["content"])
-                citations.append(result["citation"])
-        
-        # Generate AI response with Bitcoin context
-        ai_response = await llm_service.generate_response(
-            message=request.message,
-            context=context_results,
-            session_id=request.session_id
-        )
+            if model_used == "openai" and not request.bypass_cache:
+                await answer_cache.store(request.message, cache_context, ai_response, citations)
         
-        # Save user message to database
-        await postgres_client.save_chat_message(
-            session_id=request.session_id,
-            role="user",
-            content=request.message
-        )
+        _remember_turn(request.session_id, request.message, ai_response)
+        
+        # The user message must land before the assistant reply
+        await save_user
         
-        # Save assistant response to database
-        await postgres_client.save_chat_message(
+        # Save assistant response to database (write-behind unless configured sync)
+        await timer.measure("persist_assistant", message_writer.save(
             session_id=request.session_id,
             role="assistant", 
             content=ai_response,
             citations=citations
-        )
+        ))
+        
+        response.headers["Server-Timing"] = timer.server_timing_header()
         
         return ChatResponse(
             message=ai_response,
             citations=citations,
             session_id=request.session_id,
-            model_used=llm_service.last_model_used,
+            model_used=model_used,
             timestamp=datetime.now()
         )
         
     except Exception as e:
         print(f"Chat endpoint error: {e}")
+        _cancel_pending(save_user, load_history)
         raise HTTPException(
             status_code=500, 
             detail=f"Failed to process chat message: {str(e)}"
         )
 
+@router.post("/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Stream an AI response token-by-token as server-sent events
+    
+    Event sequence:
+    1. `citations` - knowledge base citations, sent before generation starts
+    2. `token` - one event per content delta from the model
+    3. `done` - session and model metadata once the answer is complete
+    
+    The assembled answer is saved to the database after the stream completes.
+    An `error` event is emitted if generation fails mid-stream. A semantic
+    cache hit is sent as a single `token` event with model_used="cache".
+    """
+    timer = StageTimer()
+    started_at = datetime.now()
+    save_user = load_history = None
+    try:
+        # Persist the user message and load prior turns concurrently with retrieval
+        save_user = asyncio.create_task(timer.measure("persist_user", message_writer.save(
+            session_id=request.session_id,
+            role="user",
+            content=request.message
+        )))
+        load_history = asyncio.create_task(timer.measure("history", conversation_memory.get_window(
+            request.session_id,
+            before=started_at
+        )))
+        
+        context_results, citations = await timer.measure("retrieval", _retrieve_context(request))
+        history = conversation_memory.pack(await load_history)
+        cache_context = _cache_context(context_results, history)
+        
+        cached = None
+        if not request.bypass_cache:
+            cached = await timer.measure("cache", answer_cache.lookup(request.message, cache_context))
+            if cached:
+                citations = cached.citations
+    except Exception as e:
+        print(f"Chat stream error: {e}")
+        _cancel_pending(save_user, load_history)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to process chat message: {str(e)}"
+        )
+    
+    async def event_stream():
+        yield _sse_event("citations", {"citations": citations})
+        
+        if cached:
+            model_used = "cache"
+            ai_response = cached.answer
+            yield _sse_event("token", {"content": ai_response})
+        else:
+            chunks = []
+            try:
+                token_stream = await llm_service.generate_response(
+                    message=request.message,
+                    context=context_results,
+                    session_id=request.session_id,
+                    stream=True,
+                    history=history
+                )
+                model_used = llm_service.last_model_used
+                
+                async for delta in token_stream:
+                    if not chunks:
+                        timer.mark("first_token")
+                    chunks.append(delta)
+                    yield _sse_event("token", {"content": delta})
+                timer.mark("llm_done")
+                    
+            except Exception as e:
+                print(f"Chat stream error: {e}")
+                _cancel_pending(save_user)
+                yield _sse_event("error", {"detail": f"Failed to process chat message: {str(e)}"})
+                return
+            
+            ai_response = "".join(chunks)
+        
+        # Tokens are already out, so failures here must still end the stream with an event
+        try:
+            if model_used == "openai" and not request.bypass_cache:
+                await answer_cache.store(request.message, cache_context, ai_response, citations)
+            
+            _remember_turn(request.session_id, request.message, ai_response)
+            
+            await save_user
+            await message_writer.save(
+                session_id=request.session_id,
+                role="assistant",
+                content=ai_response,
+                citations=citations
+            )
+        except Exception as e:
+            print(f"Chat stream error: {e}")
+            _cancel_pending(save_user)
+            yield _sse_event("error", {"detail": f"Failed to save chat message: {str(e)}"})
+            return
+        
+        yield _sse_event("done", {
+            "session_id": request.session_id,
+            "model_used": model_used,
+            "timestamp": datetime.now(),
+            "timings": timer.timings()
+        })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            # Only pre-stream stages are known here; the done event has the full breakdown
+            "Server-Timing": timer.server_timing_header()
+        }
+    )
+
 @router.get("/sessions/{session_id}/history")
 async def get_chat_history(session_id: str, limit: int = 50):
     """Get chat history for a specific session"""
@@ -94,7 +289,7 @@ async def test_chat():
     )
     
     try:
-        response = await chat_message(test_request)
+        response = await chat_message(test_request, Response())
         return {
             "status": "success",
             "test_response": response,
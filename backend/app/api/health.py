@@ -1,9 +1,14 @@
 from fastapi import APIRouter
 from app.config import settings
 from app.db.postgres import postgres_client
+from app.db.message_writer import message_writer
 from app.db.qdrant_client import vector_db
-from app.external.openai_client import openai_client
-from app.external.coingecko import coingecko_client
+from app.services.rag_service import rag_service
+from app.services.llm_health import llm_health_monitor
+from app.services.answer_cache import answer_cache
+from app.services.conversation_memory import conversation_memory
+from app.services.price_poller import price_poller
+from app.services.price_broadcaster import price_broadcaster
 from datetime import datetime
 import asyncio
 
@@ -49,11 +54,13 @@ async def detailed_health_check():
     # Check database connectivity
     try:
         # Test PostgreSQL
-        await postgres_client.execute_query("SELECT 1")
+        await postgres_client.ping()
         health_status["services"]["database"] = {
             "status": "healthy",
             "type": "PostgreSQL",
-            "message": "Connected successfully"
+            "message": "Connected successfully",
+            "pool": postgres_client.pool_stats(),
+            "message_writer": message_writer.stats()
         }
     except Exception as e:
         health_status["services"]["database"] = {
@@ -65,12 +72,21 @@ async def detailed_health_check():
     
     # Check vector database
     try:
-        if vector_db.client:
-            health_status["services"]["vector_db"] = {
+        if vector_db.client or vector_db.local_index:
+            vector_status = {
                 "status": "healthy",
-                "type": "Qdrant",
-                "message": "Connected successfully"
+                "embedding_backend": vector_db.embedding_backend,
+                "embedding_parity": vector_db.embedding_parity,
+                "embedding_cache": vector_db.query_cache.stats(),
+                "local_index": vector_db.local_index.stats() if vector_db.local_index else None,
+                "lexical_index": rag_service.lexical_index.stats() if rag_service.lexical_index else None,
+                "reranker": rag_service.reranker.stats()
             }
+            if vector_db.client:
+                vector_status.update(type="Qdrant", message="Connected successfully")
+            else:
+                vector_status.update(type="Local index", message="Serving from in-process vector index")
+            health_status["services"]["vector_db"] = vector_status
         else:
             health_status["services"]["vector_db"] = {
                 "status": "initializing",
@@ -84,13 +100,21 @@ async def detailed_health_check():
             "message": f"Connection failed: {str(e)}"
         }
     
-    # Check OpenAI API
+    # Check OpenAI API (cached probe + circuit breaker, no live round trip)
     try:
-        is_available = await openai_client.is_available()
+        llm_status = llm_health_monitor.status()
+        # Availability follows real completions only; the probe result is informational
+        is_available = llm_status["circuit_breaker"]["state"] != "open"
         health_status["services"]["llm"] = {
             "status": "healthy" if is_available else "degraded",
             "type": "OpenAI",
-            "message": "API accessible" if is_available else "API issues detected"
+            "message": "API accessible" if is_available else "API issues detected",
+            "circuit_breaker": llm_status["circuit_breaker"],
+            "last_probe_ok": llm_status["last_probe_ok"],
+            "last_probe_at": llm_status["last_probe_at"],
+            "last_probe_error": llm_status["last_probe_error"],
+            "answer_cache": answer_cache.stats(),
+            "conversation_memory": conversation_memory.stats()
         }
         if not is_available:
             health_status["overall_health"] = False
@@ -102,21 +126,24 @@ async def detailed_health_check():
         }
         health_status["overall_health"] = False
     
-    # Check CoinGecko API
+    # Check CoinGecko API (cached background poll, no live round trip)
     try:
-        price_data = await coingecko_client.get_bitcoin_price()
-        if price_data and price_data.get("current_price"):
+        poll_status = price_poller.status()
+        if poll_status["last_price"] is not None and not poll_status["stale"]:
             health_status["services"]["price_api"] = {
                 "status": "healthy",
                 "type": "CoinGecko",
                 "message": "Price data available",
-                "last_price": price_data.get("current_price")
+                **poll_status,
+                "stream": price_broadcaster.stats()
             }
         else:
             health_status["services"]["price_api"] = {
                 "status": "degraded", 
                 "type": "CoinGecko",
-                "message": "Using fallback data"
+                "message": "Serving last good price (stale)" if poll_status["last_price"] is not None else "Using fallback data",
+                **poll_status,
+                "stream": price_broadcaster.stats()
             }
     except Exception as e:
         health_status["services"]["price_api"] = {
@@ -143,8 +170,8 @@ async def readiness_check():
     - Critical dependencies status
     """
     try:
-        # Check critical services only
-        await postgres_client.execute_query("SELECT 1")
+        # Check critical services only (through the shared connection pool)
+        await postgres_client.ping()
         
         return {
             "status": "ready",
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from app.models.prices import PriceData, PriceHistory
 from app.services.price_service import price_service
+from app.services.price_broadcaster import price_broadcaster
 from typing import Optional
 
 router = APIRouter(prefix="/prices", tags=["prices"])
@@ -27,6 +29,35 @@ async def get_current_price():
             detail=f"Failed to retrieve current price: {str(e)}"
         )
 
+@router.get("/stream")
+async def stream_prices():
+    """
+    Stream live Bitcoin price updates as server-sent events
+    
+    Events:
+    1. `snapshot` - the full current price record, sent once on connect
+    2. `price` - only the fields that changed since the last event
+    
+    All streams share one upstream feed (the background price poller). A
+    client that reads slowly receives the latest values rather than a
+    backlog. Idle streams get a keepalive comment periodically.
+    """
+    stream = price_broadcaster.subscribe()
+    if stream is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many open price streams, poll /api/prices/current instead"
+        )
+    
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
 @router.get("/history", response_model=Optional[PriceHistory])
 async def get_price_history(
     days: int = Query(default=7, ge=1, le=365, description="Number of days of price history")
@@ -85,7 +116,8 @@ async def get_price_summary():
 @router.get("/chart")
 async def get_chart_data(
     timeframe: str = Query(default="7d", description="Timeframe: 1d, 7d, 30d, 90d, 1y"),
-    interval: str = Query(default="daily", description="Data interval: hourly, daily")
+    interval: str = Query(default="daily", description="Data interval: hourly, daily"),
+    max_points: Optional[int] = Query(default=None, ge=3, le=10000, description="Downsample to at most this many points")
 ):
     """
     Get Bitcoin price data formatted for charts
@@ -93,10 +125,11 @@ async def get_chart_data(
     Parameters:
     - timeframe: 1d, 7d, 30d, 90d, 1y
     - interval: hourly, daily
+    - max_points: optional cap; larger series are reduced with LTTB, which keeps peaks and troughs
     
     Returns:
-    - Chart-ready price data with timestamps
-    - OHLC data when available
+    - Parallel `timestamps` (ms) and `prices` arrays
+    - `total_points` before downsampling
     """
     try:
         # Map timeframes to days
@@ -109,32 +142,33 @@ async def get_chart_data(
         }
         
         days = timeframe_map.get(timeframe, 7)
-        history = await price_service.get_price_history(days=days)
+        series = await price_service.get_price_series(days=days)
         
-        if not history:
+        if not series:
             return {
                 "timeframe": timeframe,
                 "interval": interval,
-                "data": [],
+                "timestamps": [],
+                "prices": [],
+                "total_points": 0,
+                "returned_points": 0,
                 "message": "Chart data not available"
             }
         
-        # Format for charting (convert to simpler format)
-        chart_data = []
-        for price_point in history.prices:
-            chart_data.append({
-                "timestamp": price_point[0],
-                "price": price_point[1],
-                "date": price_point[0] # Will be converted to readable format by frontend
-            })
+        total_points = len(series)
+        if max_points:
+            series = series.downsample(max_points)
         
-        return {
+        # Plain lists of numbers: skip FastAPI's per-element jsonable_encoder pass
+        return JSONResponse({
             "timeframe": timeframe,
             "interval": interval,
             "symbol": "BTC",
-            "data": chart_data,
-            "total_points": len(chart_data)
-        }
+            **series.to_columns(),
+            "total_points": total_points,
+            "returned_points": len(series),
+            "stale": series.stale
+        })
         
     except Exception as e:
         print(f"Chart data error: {e}")
@@ -17,6 +17,7 @@ async def api_root():
         "version": "1.0.0",
         "endpoints": [
             "/api/chat/message",
+            "/api/chat/stream",
             "/api/prices/current",
             "/api/news/latest", 
             "/api/health"
@@ -0,0 +1,299 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+import codecs
+import json
+import re
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WORD = re.compile(r"\S+")
+
+def is_utf8_file(path: Path, block_size: int = 1 << 20) -> bool:
+    """Whether a file decodes as UTF-8, checked in blocks without loading it"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        with open(path, "rb") as f:
+            while True:
+                block = f.read(block_size)
+                decoder.decode(block, final=not block)
+                if not block:
+                    return True
+    except UnicodeDecodeError:
+        return False
+
+def approximate_token_count(text: str) -> int:
+    """Rough word-piece estimate used when no tokenizer is available"""
+    return int(len(text.split()) * 1.3) + 1
+
+@dataclass
+class Chunk:
+    """A token-bounded slice of a source document"""
+    text: str
+    source_path: str
+    headings: List[str] = field(default_factory=list)
+    start_offset: int = 0
+    end_offset: int = 0
+    chunk_index: int = 0
+    record: Optional[int] = None  # line number for JSONL records
+
+    @property
+    def heading_path(self) -> str:
+        return " > ".join(self.headings)
+
+    @property
+    def embedding_text(self) -> str:
+        """Chunk text prefixed with its section path for better retrieval"""
+        return f"{self.heading_path}\n\n{self.text}" if self.headings else self.text
+
+@dataclass
+class _Block:
+    text: str
+    start: int
+    end: int
+    tokens: int
+
+class DocumentChunker:
+    """
+    Splits long documents into overlapping, token-bounded chunks
+
+    Files are read line by line, so only the current section is held in
+    memory. Markdown headings close the current section and are carried in
+    each chunk's heading path; chunks never span two sections. Paragraphs
+    are packed up to `max_tokens`, with the trailing `overlap_tokens` of
+    each chunk repeated at the start of the next. Character offsets into
+    the source file (or JSONL record) are kept for citations.
+    """
+
+    SUPPORTED_SUFFIXES = {".md", ".markdown", ".txt", ".jsonl"}
+
+    def __init__(
+        self,
+        max_tokens: int = 200,
+        overlap_tokens: int = 40,
+        count_tokens: Optional[Callable[[str], int]] = None
+    ):
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.count_tokens = count_tokens or approximate_token_count
+
+    def iter_directory(self, root: Path, exclude: Tuple[str, ...] = ()) -> Iterator[Chunk]:
+        """Stream chunks from every supported file under `root`"""
+        for path in sorted(root.rglob("*")):
+            if not path.is_file() or path.suffix.lower() not in self.SUPPORTED_SUFFIXES:
+                continue
+            relative = path.relative_to(root)
+            if any(part in exclude or part.startswith(".") for part in relative.parts):
+                continue
+            # One bad file must not abort the whole directory
+            if not is_utf8_file(path):
+                print(f"⚠️ Skipping {relative}: not valid UTF-8")
+                continue
+            try:
+                yield from self.iter_file(path, str(relative))
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"⚠️ Skipping rest of {relative}: {e}")
+
+    def iter_file(self, path: Path, source_path: str) -> Iterator[Chunk]:
+        """Stream chunks from a single file"""
+        if path.suffix.lower() == ".jsonl":
+            yield from self._iter_jsonl(path, source_path)
+            return
+
+        markdown = path.suffix.lower() in {".md", ".markdown"}
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            yield from self._iter_lines(f, source_path, markdown=markdown)
+
+    def _iter_jsonl(self, path: Path, source_path: str) -> Iterator[Chunk]:
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"⚠️ Skipping invalid JSON on line {line_number} of {source_path}: {e}")
+                    continue
+                if not isinstance(record, dict):
+                    print(f"⚠️ Skipping line {line_number} of {source_path}: expected a JSON object")
+                    continue
+                text = record.get("content") or record.get("text") or ""
+                if not isinstance(text, str):
+                    print(f"⚠️ Skipping line {line_number} of {source_path}: content is not a string")
+                    continue
+                title = record.get("title")
+                if title is not None and not isinstance(title, str):
+                    title = str(title)
+                lines = text.splitlines(keepends=True)
+                for chunk in self._iter_lines(lines, source_path, markdown=False, headings=[title] if title else []):
+                    chunk.record = line_number
+                    yield chunk
+
+    def _iter_lines(self, lines, source_path: str, markdown: bool, headings: Optional[List[str]] = None) -> Iterator[Chunk]:
+        heading_stack: List[Tuple[int, str]] = [(0, h) for h in (headings or [])]
+        packer = _SectionPacker(self, source_path, [h for _, h in heading_stack], 0)
+        paragraph: List[str] = []
+        paragraph_start = 0
+        paragraph_chars = 0
+        offset = 0
+        in_fence = False
+        # Bound memory for text with no blank lines (roughly 8 chunks' worth of characters)
+        max_paragraph_chars = self.max_tokens * 32
+
+        def end_paragraph():
+            nonlocal paragraph_chars
+            raw = "".join(paragraph)
+            text = raw.strip()
+            paragraph.clear()
+            paragraph_chars = 0
+            if text:
+                # Paragraph lines are contiguous in the source, so offsets are exact
+                start = paragraph_start + len(raw) - len(raw.lstrip())
+                for block in self._split_block(text, start):
+                    yield from packer.add(block)
+
+        for line in lines:
+            if markdown and _FENCE.match(line):
+                in_fence = not in_fence
+
+            heading = _HEADING.match(line) if markdown and not in_fence else None
+            if heading:
+                # A heading closes the current section; chunks never span sections
+                yield from end_paragraph()
+                yield from packer.finish()
+                level = len(heading.group(1))
+                heading_stack = [(l, h) for l, h in heading_stack if l < level]
+                heading_stack.append((level, heading.group(2)))
+                packer = _SectionPacker(self, source_path, [h for _, h in heading_stack], packer.next_index)
+            elif not line.strip() and not in_fence:
+                yield from end_paragraph()
+            else:
+                if not paragraph:
+                    paragraph_start = offset
+                paragraph.append(line)
+                paragraph_chars += len(line)
+
+            offset += len(line)
+
+            if paragraph_chars > max_paragraph_chars:
+                yield from end_paragraph()
+
+        yield from end_paragraph()
+        yield from packer.finish()
+
+    def _split_block(self, text: str, start: int) -> List[_Block]:
+        """Split a paragraph that exceeds max_tokens into sentence/word windows"""
+        tokens = self.count_tokens(text)
+        if tokens <= self.max_tokens:
+            return [_Block(text, start, start + len(text), tokens)]
+
+        spans = []
+        cursor = 0
+        for match in _SENTENCE_END.finditer(text):
+            spans.append((cursor, match.start()))
+            cursor = match.end()
+        spans.append((cursor, len(text)))
+        if len(spans) == 1:
+            return self._split_words(text, start)
+
+        blocks = []
+        for piece_start, piece_end in spans:
+            piece = text[piece_start:piece_end]
+            piece_tokens = self.count_tokens(piece)
+            if piece_tokens > self.max_tokens:
+                blocks.extend(self._split_block(piece, start + piece_start))
+            else:
+                blocks.append(_Block(piece, start + piece_start, start + piece_end, piece_tokens))
+        return blocks
+
+    def _split_words(self, text: str, start: int) -> List[_Block]:
+        """
+        Overlapping word windows for text with no sentence breaks
+
+        Each window is already close to max_tokens, so the packer cannot carry
+        one over as overlap; the windows overlap each other instead. Window
+        and overlap sizes are found by binary search with `count_tokens`.
+        """
+        words = [m.span() for m in _WORD.finditer(text)]
+
+        def tokens_between(first: int, last: int) -> int:
+            return self.count_tokens(text[words[first][0]:words[last - 1][1]])
+
+        blocks = []
+        i = 0
+        while i < len(words):
+            # Largest end with the window within max_tokens (a word is at least one token)
+            lo, hi = i + 1, min(len(words), i + self.max_tokens)
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if tokens_between(i, mid) <= self.max_tokens:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            end = lo
+
+            piece = text[words[i][0]:words[end - 1][1]]
+            blocks.append(_Block(piece, start + words[i][0], start + words[end - 1][1], self.count_tokens(piece)))
+            if end >= len(words):
+                break
+
+            # Earliest start whose tail up to `end` fits in overlap_tokens
+            lo, hi = i + 1, end
+            while lo < hi:
+                mid = (lo + hi) // 2
+                if tokens_between(mid, end) <= self.overlap_tokens:
+                    hi = mid
+                else:
+                    lo = mid + 1
+            i = lo
+        return blocks
+
+class _SectionPacker:
+    """Greedily packs a section's blocks into chunks as they stream in, with trailing-block overlap"""
+
+    def __init__(self, chunker: DocumentChunker, source_path: str, headings: List[str], first_index: int):
+        self.chunker = chunker
+        self.source_path = source_path
+        self.headings = headings
+        self.next_index = first_index
+        self.current: List[_Block] = []
+        self.current_tokens = 0
+        self.has_new = False  # whether `current` holds anything beyond carried-over overlap
+
+    def add(self, block: _Block) -> Iterator[Chunk]:
+        if self.has_new and self.current_tokens + block.tokens > self.chunker.max_tokens:
+            yield self._emit()
+
+            # Carry trailing blocks into the next chunk as overlap
+            overlap: List[_Block] = []
+            overlap_tokens = 0
+            for previous in reversed(self.current):
+                if overlap_tokens + previous.tokens > self.chunker.overlap_tokens:
+                    break
+                overlap.insert(0, previous)
+                overlap_tokens += previous.tokens
+            if overlap_tokens + block.tokens > self.chunker.max_tokens:
+                overlap, overlap_tokens = [], 0
+            self.current, self.current_tokens = overlap, overlap_tokens
+
+        self.current.append(block)
+        self.current_tokens += block.tokens
+        self.has_new = True
+
+    def finish(self) -> Iterator[Chunk]:
+        if self.has_new:
+            yield self._emit()
+        self.current, self.current_tokens, self.has_new = [], 0, False
+
+    def _emit(self) -> Chunk:
+        chunk = Chunk(
+            text="\n\n".join(b.text for b in self.current),
+            source_path=self.source_path,
+            headings=list(self.headings),
+            start_offset=self.current[0].start,
+            end_offset=self.current[-1].end,
+            chunk_index=self.next_index
+        )
+        self.next_index += 1
+        return chunk
@@ -0,0 +1,96 @@
+import time
+from typing import Any, Dict, Optional
+
+class CircuitBreaker:
+    """
+    Three-state circuit breaker fed by real call outcomes
+
+    - closed: calls pass through; consecutive failures are counted
+    - open: calls are rejected until the recovery timeout elapses
+    - half_open: a single trial call is let through; its outcome decides
+      whether the breaker closes again or re-opens
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.total_successes = 0
+        self.rejected_calls = 0
+        self.last_failure: Optional[str] = None
+        self._opened_at = 0.0
+        self._trial_started_at: Optional[float] = None
+
+    def allow_request(self) -> bool:
+        """Return whether a call may be attempted right now"""
+        now = time.monotonic()
+
+        if self.state == self.OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._transition(self.HALF_OPEN)
+
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.HALF_OPEN:
+            # Only one trial at a time; a trial that never reported back
+            # (e.g. a cancelled request) is abandoned after the timeout
+            if self._trial_started_at is None or now - self._trial_started_at >= self.recovery_timeout:
+                self._trial_started_at = now
+                return True
+
+        self.rejected_calls += 1
+        return False
+
+    def record_success(self):
+        """Report a successful call"""
+        self.total_successes += 1
+        self.consecutive_failures = 0
+        if self.state != self.CLOSED:
+            self._transition(self.CLOSED)
+
+    def record_failure(self, reason: str = ""):
+        """Report a failed call (timeout, rate limit, server error...)"""
+        self.total_failures += 1
+        self.consecutive_failures += 1
+        self.last_failure = reason or None
+
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self._transition(self.OPEN)
+
+    def try_half_open(self):
+        """Move an open breaker to half-open early, e.g. after a passing health probe"""
+        if self.state == self.OPEN:
+            self._transition(self.HALF_OPEN)
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        print(f"⚡ Circuit breaker '{self.name}': {self.state} -> {state}")
+        self.state = state
+        self._trial_started_at = None
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current breaker state for health reporting"""
+        retry_in = None
+        if self.state == self.OPEN:
+            retry_in = max(0.0, round(self.recovery_timeout - (time.monotonic() - self._opened_at), 1))
+
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "total_failures": self.total_failures,
+            "total_successes": self.total_successes,
+            "rejected_calls": self.rejected_calls,
+            "last_failure": self.last_failure,
+            "retry_in_seconds": retry_in
+        }
@@ -2,8 +2,8 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import asyncio
-import psycopg2
 from app.config import settings
+from app.db.postgres import postgres_client
 
 # SQLAlchemy setup
 engine = create_engine(settings.database_url)
@@ -19,16 +19,20 @@ def get_db():
         db.close()
 
 async def init_db():
-    """Initialize database connection and create tables if needed"""
+    """Initialize database connection pool and create tables if needed"""
     try:
-        # Test connection
-        conn = psycopg2.connect(settings.database_url)
-        conn.close()
-        print("✅ Database connection established")
+        # Open the shared async pool and test a connection
+        await postgres_client.connect()
+        await postgres_client.ping()
+        print("✅ Database connection pool established")
         
         # Create tables (will be done by setup script)
         print("💾 Database ready for Sprint 1")
         
     except Exception as e:
         print(f"⚠️ Database connection failed: {e}")
-        print("Database will be initialized when PostgreSQL is ready")
\ No newline at end of file
+        print("Database will be initialized when PostgreSQL is ready")
+
+async def close_db():
+    """Close the database connection pool"""
+    await postgres_client.close()
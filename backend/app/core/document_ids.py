@@ -0,0 +1,13 @@
+import hashlib
+import uuid
+
+# Fixed namespace so IDs are identical across runs, machines and Python processes
+DOCUMENT_NAMESPACE = uuid.UUID("5d0c7a1e-8f3b-5b8e-9c3a-2b1f0e6d4c7a")
+
+def content_hash(content: str) -> str:
+    """SHA-256 hex digest of document content"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def document_id(source: str, content: str) -> str:
+    """Stable, content-addressed Qdrant point ID (UUIDv5 of source + content)"""
+    return str(uuid.uuid5(DOCUMENT_NAMESPACE, f"{source}\x00{content_hash(content)}"))
@@ -0,0 +1,151 @@
+from pathlib import Path
+from typing import List, Optional
+import json
+
+import numpy as np
+
+# Optional inference dependencies; each backend checks for what it needs
+try:
+    import torch
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    torch = None
+    SentenceTransformer = None
+
+try:
+    import onnxruntime
+    from optimum.onnxruntime import ORTModelForFeatureExtraction
+    from transformers import AutoTokenizer
+    from huggingface_hub import hf_hub_download
+    ONNX_AVAILABLE = True
+except ImportError:
+    onnxruntime = None
+    ORTModelForFeatureExtraction = None
+    ONNX_AVAILABLE = False
+
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx")
+
+# Exported ONNX graphs are kept here (one subdirectory per model) unless a directory is given
+DEFAULT_ONNX_CACHE_DIR = Path.home() / ".cache" / "chatbtc" / "onnx"
+
+# Short and long inputs, so warm-up and parity cover padding and truncation paths
+SAMPLE_TEXTS = [
+    "What is Bitcoin?",
+    "How does proof of work secure the blockchain against double spending?",
+    "BIP-341 defines Taproot: a SegWit version 1 output type whose spending rules are "
+    "based on Schnorr signatures and Merkle branches, improving privacy and efficiency. " * 4
+]
+
+def hub_model_id(model_name: str) -> str:
+    # SentenceTransformer resolves bare names such as all-MiniLM-L6-v2 under this org
+    return model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+
+class OnnxSentenceEncoder:
+    """
+    SentenceTransformer-compatible `encode()` backed by ONNX Runtime
+
+    The transformer is exported to ONNX on first load and saved under
+    `cache_dir`, from which later starts load it directly. Pooling, maximum
+    sequence length and normalization are read from the sentence-transformers
+    config so vectors match the PyTorch model.
+    """
+
+    def __init__(self, model_name: str, threads: Optional[int] = None, cache_dir: Optional[str] = None):
+        model_id = hub_model_id(model_name)
+        options = onnxruntime.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+
+        export_dir = Path(cache_dir or DEFAULT_ONNX_CACHE_DIR) / model_id.replace("/", "--")
+        if (export_dir / "model.onnx").exists():
+            self.model = ORTModelForFeatureExtraction.from_pretrained(export_dir, session_options=options)
+        else:
+            self.model = ORTModelForFeatureExtraction.from_pretrained(model_id, export=True, session_options=options)
+            try:
+                self.model.save_pretrained(export_dir)
+                print(f"💾 Saved ONNX export of {model_id} to {export_dir}")
+            except OSError as e:
+                print(f"⚠️ Could not save ONNX export to {export_dir}: {e}")
+        self.tokenizer = AutoTokenizer.from_pretrained(model_id)
+
+        self.max_seq_length = self._read_config(model_id, "sentence_bert_config.json").get("max_seq_length", 256)
+        pooling = self._read_config(model_id, "1_Pooling/config.json")
+        self.cls_pooling = bool(pooling.get("pooling_mode_cls_token"))
+        modules = self._read_config(model_id, "modules.json") or []
+        self.normalize = any(module.get("type", "").endswith("Normalize") for module in modules)
+
+    @staticmethod
+    def _read_config(model_id: str, filename: str):
+        try:
+            with open(hf_hub_download(model_id, filename), "r") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def encode(self, texts: List[str], batch_size: int = 32, **kwargs) -> np.ndarray:
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np"
+            )
+            token_embeddings = self.model(**inputs).last_hidden_state
+            if not isinstance(token_embeddings, np.ndarray):
+                token_embeddings = token_embeddings.numpy()
+
+            if self.cls_pooling:
+                embeddings = token_embeddings[:, 0]
+            else:
+                mask = inputs["attention_mask"][..., None].astype(np.float32)
+                embeddings = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+            if self.normalize:
+                embeddings = embeddings / np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+            batches.append(embeddings.astype(np.float32))
+
+        return np.concatenate(batches) if batches else np.empty((0, 0), dtype=np.float32)
+
+def load_embedding_model(
+    model_name: str,
+    backend: str = "torch",
+    threads: Optional[int] = None,
+    onnx_cache_dir: Optional[str] = None
+):
+    """
+    Load the embedding model for CPU inference on the selected backend
+
+    "torch" is the reference fp32 SentenceTransformer, "torch-int8" applies
+    dynamic int8 quantization to its Linear layers, and "onnx" runs the
+    exported graph with ONNX Runtime (cached in `onnx_cache_dir`). `threads`
+    sets the intra-op pool size.
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}' (use {', '.join(EMBEDDING_BACKENDS)})")
+
+    if backend == "onnx":
+        if not ONNX_AVAILABLE:
+            raise ImportError("ONNX backend requires 'optimum[onnxruntime]'")
+        return OnnxSentenceEncoder(model_name, threads=threads, cache_dir=onnx_cache_dir)
+
+    if threads:
+        torch.set_num_threads(threads)
+    model = SentenceTransformer(model_name, device="cpu")
+    if backend == "torch-int8":
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+def encode_samples(model, texts: List[str] = SAMPLE_TEXTS) -> np.ndarray:
+    """Encode sample texts; run once at startup to pay lazy-initialization costs"""
+    return np.asarray(model.encode(texts, batch_size=len(texts)), dtype=np.float32)
+
+def parity(model, reference, texts: List[str] = SAMPLE_TEXTS) -> float:
+    """Lowest cosine similarity between `model` and `reference` vectors over `texts`"""
+    vectors = encode_samples(model, texts)
+    expected = encode_samples(reference, texts)
+    vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+    expected /= np.clip(np.linalg.norm(expected, axis=1, keepdims=True), 1e-12, None)
+    return float((vectors * expected).sum(axis=1).min())
@@ -0,0 +1,82 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+import asyncio
+
+class EmbeddingBatcher:
+    """
+    Runs SentenceTransformer encoding off the event loop with micro-batching
+
+    Queries that arrive within `max_wait_ms` of each other are coalesced
+    into a single batched `encode()` call on a worker thread, so concurrent
+    chat requests share one forward pass and the event loop stays free for
+    price/news endpoints.
+    """
+
+    def __init__(self, model, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedder")
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def encode(self, text: str) -> List[float]:
+        """Embed a single text, batched with any concurrent callers"""
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def encode_many(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        """Embed a list of texts directly on the worker thread, `batch_size` at a time"""
+        if not texts:
+            return []
+        loop = asyncio.get_running_loop()
+        vectors = await loop.run_in_executor(self._executor, self._encode_batch, texts, batch_size)
+        return vectors
+
+    def _encode_batch(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        return self.model.encode(texts, batch_size=batch_size or self.max_batch_size).tolist()
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Tuple[str, asyncio.Future]] = [await self._queue.get()]
+
+            # Collect whatever else arrives inside the batching window
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            texts = [text for text, _ in batch]
+            try:
+                vectors = await loop.run_in_executor(self._executor, self._encode_batch, texts)
+                for (_, future), vector in zip(batch, vectors):
+                    if not future.done():
+                        future.set_result(vector)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    async def close(self):
+        """Stop the batching worker and release the encoder thread"""
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self._executor.shutdown(wait=False)
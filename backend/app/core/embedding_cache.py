@@ -0,0 +1,143 @@
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import re
+import time
+
+import numpy as np
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_query(text: str) -> str:
+    """Fold case, punctuation and whitespace so trivial variants share a key"""
+    text = _PUNCTUATION.sub(" ", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+class EmbeddingCache:
+    """
+    Bounded LRU + TTL cache of text embeddings
+
+    Keys are normalized query text by default ("What is Bitcoin?" and
+    "what is bitcoin" share an entry); pass normalize=False to key on the
+    exact text, e.g. for document content. The cache can be persisted to
+    an .npz file and reloaded, and is tied to a single embedding model.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_size: int = 10000,
+        ttl_seconds: Optional[float] = None,
+        persist_path: Optional[str] = None,
+        normalize: bool = True
+    ):
+        self.model_name = model_name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = Path(persist_path) if persist_path else None
+        self.normalize = normalize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[List[float], float]]" = OrderedDict()
+
+    def _key(self, text: str) -> str:
+        return normalize_query(text) if self.normalize else text
+
+    def get(self, text: str) -> Optional[List[float]]:
+        """Return the cached vector for `text`, or None on a miss"""
+        key = self._key(text)
+        entry = self._entries.get(key)
+
+        if entry is not None:
+            vector, stored_at = entry
+            if self.ttl_seconds is None or time.time() - stored_at < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return vector
+            del self._entries[key]
+
+        self.misses += 1
+        return None
+
+    def put(self, text: str, vector: List[float], stored_at: Optional[float] = None):
+        """Store a vector, evicting the least recently used entries past max_size"""
+        key = self._key(text)
+        self._entries[key] = (vector, stored_at or time.time())
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def save(self) -> bool:
+        """Persist entries to `persist_path` (no-op if persistence is disabled)"""
+        if not self.persist_path or not self._entries:
+            return False
+
+        try:
+            keys = list(self._entries.keys())
+            vectors = np.asarray([self._entries[k][0] for k in keys], dtype=np.float32)
+            stored_at = np.asarray([self._entries[k][1] for k in keys], dtype=np.float64)
+
+            self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.persist_path, "wb") as f:
+                np.savez(
+                    f,
+                    model_name=np.array(self.model_name),
+                    keys=np.array(keys, dtype=str),
+                    vectors=vectors,
+                    stored_at=stored_at
+                )
+            print(f"💾 Saved {len(keys)} cached embeddings to {self.persist_path}")
+            return True
+
+        except Exception as e:
+            print(f"Embedding cache save error: {e}")
+            return False
+
+    def load(self) -> int:
+        """Load persisted entries, skipping expired ones and other models' vectors"""
+        if not self.persist_path or not self.persist_path.exists():
+            return 0
+
+        try:
+            with np.load(self.persist_path) as data:
+                if str(data["model_name"]) != self.model_name:
+                    print(f"⚠️ Embedding cache at {self.persist_path} is for a different model, ignoring")
+                    return 0
+
+                loaded = 0
+                now = time.time()
+                for key, vector, stored_at in zip(data["keys"], data["vectors"], data["stored_at"]):
+                    if self.ttl_seconds is not None and now - stored_at >= self.ttl_seconds:
+                        continue
+                    # Keys are already in their stored (normalized or exact) form
+                    self._entries[str(key)] = (vector.tolist(), float(stored_at))
+                    loaded += 1
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+            print(f"✅ Loaded {loaded} cached embeddings from {self.persist_path}")
+            return loaded
+
+        except Exception as e:
+            print(f"Embedding cache load error: {e}")
+            return 0
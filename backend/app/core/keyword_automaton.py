@@ -0,0 +1,83 @@
+from collections import deque
+from typing import Dict, Generic, List, Tuple, TypeVar
+import re
+
+T = TypeVar("T")
+
+# Underscores are word characters, so identifiers like OP_CHECKSIG stay one word
+_NON_WORD = re.compile(r"[^a-z0-9_]+")
+
+def normalize_phrase(text: str) -> str:
+    """Lowercase and collapse punctuation/whitespace runs to single spaces, padded at both ends"""
+    return f" {_NON_WORD.sub(' ', text.lower()).strip()} "
+
+class KeywordAutomaton(Generic[T]):
+    """
+    Aho-Corasick automaton for multi-phrase matching in one pass over the text
+
+    Phrases and text are normalized to space-separated lowercase words padded
+    with spaces, so a match always starts and ends on a word boundary ("work"
+    never matches inside "proof of work", nor "node" inside "nodes", nor "op"
+    inside "OP_CHECKSIG"). Overlapping matches are all reported.
+    """
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._phrases: List[List[Tuple[int, T]]] = [[]]  # phrases ending exactly at each state
+        self._outputs: List[List[Tuple[int, T]]] = [[]]  # plus those reachable via failure links
+        self._built = False
+
+    def add(self, phrase: str, value: T):
+        """Register a phrase; call `build()` once all phrases are added"""
+        pattern = normalize_phrase(phrase)
+        if not pattern.strip():
+            return
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._phrases.append([])
+            state = next_state
+        self._phrases[state].append((len(pattern), value))
+        self._built = False
+
+    def build(self):
+        """Compute failure links and output sets breadth-first"""
+        self._outputs = [list(phrases) for phrases in self._phrases]
+        queue = deque(self._goto[0].values())
+        for state in queue:
+            self._fail[state] = 0
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+        self._built = True
+
+    def find(self, text: str) -> List[Tuple[int, int, T]]:
+        """Return (start, end, value) for every phrase occurrence in the normalized text"""
+        if not self._built:
+            self.build()
+        normalized = normalize_phrase(text)
+        matches = []
+        state = 0
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        for position, char in enumerate(normalized):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, value in outputs[state]:
+                matches.append((position + 1 - length, position + 1, value))
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._goto)
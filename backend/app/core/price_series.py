@@ -0,0 +1,84 @@
+from typing import Any, Dict, List, Sequence
+import numpy as np
+
+# Downsampled views kept per series (clients tend to reuse a handful of sizes)
+MAX_CACHED_VIEWS = 8
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets downsampling
+
+    The first and last points are always kept. The points between them are
+    split into `max_points - 2` buckets, and from each bucket the point that
+    forms the largest triangle with the previously kept point and the next
+    bucket's average is chosen, which preserves peaks and troughs.
+    """
+    length = len(x)
+    if max_points >= length or max_points < 3:
+        return np.arange(length)
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    edges = np.linspace(1, length - 1, max_points - 1).astype(np.int64)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+    # The last bucket looks ahead to the final point itself
+    mean_x = np.append(mean_x[1:], x[-1])
+    mean_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, length - 1
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        areas = np.abs((ax - mean_x[bucket]) * (y[start:end] - ay) - (ax - x[start:end]) * (mean_y[bucket] - ay))
+        previous = start + int(areas.argmax())
+        selected[bucket + 1] = previous
+    return selected
+
+class PriceSeries:
+    """
+    Columnar (timestamp, price) series backed by NumPy arrays
+
+    Built once from a history's [[timestamp, price], ...] pairs. Charts read
+    the columns directly, and downsampled views are cached per size, so no
+    per-point Python objects are created on the request path.
+    """
+
+    def __init__(self, timestamps: np.ndarray, prices: np.ndarray, stale: bool = False):
+        self.timestamps = timestamps
+        self.prices = prices
+        self.stale = stale
+        self._views: Dict[int, "PriceSeries"] = {}
+
+    @classmethod
+    def from_pairs(cls, pairs: Sequence[Sequence[float]], stale: bool = False) -> "PriceSeries":
+        if not pairs:
+            return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64), stale)
+        array = np.asarray(pairs, dtype=np.float64)
+        return cls(array[:, 0].astype(np.int64), np.ascontiguousarray(array[:, 1]), stale)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def downsample(self, max_points: int) -> "PriceSeries":
+        """At most `max_points` points chosen by LTTB (the series itself if already small enough)"""
+        if max_points >= len(self) or max_points < 3:
+            return self
+        view = self._views.get(max_points)
+        if view is None:
+            indices = lttb_indices(self.timestamps, self.prices, max_points)
+            view = PriceSeries(self.timestamps[indices], self.prices[indices], self.stale)
+            if len(self._views) >= MAX_CACHED_VIEWS:
+                self._views.pop(next(iter(self._views)))
+            self._views[max_points] = view
+        return view
+
+    def to_columns(self) -> Dict[str, List[Any]]:
+        """Plain lists for JSON encoding (converted in C by `tolist`)"""
+        return {
+            "timestamps": self.timestamps.tolist(),
+            "prices": self.prices.tolist()
+        }
@@ -0,0 +1,55 @@
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+import asyncio
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one in-flight execution
+
+    The first caller for a key starts the call; callers arriving while it is
+    running wait on the same task and receive its result or exception. Each
+    waiter gives up after `timeout` seconds with `asyncio.TimeoutError`,
+    but the shared call keeps running for the others (and for whatever
+    cache it fills).
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+        self.calls = 0
+        self.coalesced = 0
+        self.timeouts = 0
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]], timeout: Optional[float] = None) -> T:
+        """Run `fn()` for `key`, or join the call already in flight for it"""
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+
+        try:
+            # shield: one waiter timing out or being cancelled must not cancel the shared call
+            return await asyncio.wait_for(asyncio.shield(task), timeout if timeout is not None else self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter has timed out
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._inflight),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "timeouts": self.timeouts
+        }
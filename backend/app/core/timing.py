@@ -0,0 +1,33 @@
+from typing import Awaitable, Dict, TypeVar
+import time
+
+T = TypeVar("T")
+
+class StageTimer:
+    """Records wall-clock duration of named pipeline stages for a single request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+
+    async def measure(self, name: str, awaitable: Awaitable[T]) -> T:
+        """Await `awaitable`, recording how long it took under `name`"""
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.durations[name] = (time.perf_counter() - start) * 1000
+
+    def mark(self, name: str):
+        """Record the time elapsed since the timer started under `name`"""
+        self.durations[name] = (time.perf_counter() - self.started) * 1000
+
+    def timings(self) -> Dict[str, float]:
+        """Stage durations in milliseconds, plus the total since the timer started"""
+        timings = {name: round(ms, 2) for name, ms in self.durations.items()}
+        timings["total"] = round((time.perf_counter() - self.started) * 1000, 2)
+        return timings
+
+    def server_timing_header(self) -> str:
+        """Format timings as a Server-Timing header value"""
+        return ", ".join(f"{name};dur={ms}" for name, ms in self.timings().items())
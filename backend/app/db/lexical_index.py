@@ -0,0 +1,188 @@
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import os
+import re
+import numpy as np
+from app.db.payload_store import PayloadReader, PayloadWriter
+
+POSTINGS_FILE = "postings.npz"
+PAYLOADS_FILE = "payloads.jsonl"
+META_FILE = "meta.json"
+
+# Keeps jargon such as "bip-341", "op_checksigadd" and "0.21.1" as single tokens
+_TOKEN = re.compile(r"[a-z0-9]+(?:[_\-.][a-z0-9]+)*")
+_TOKEN_SEPARATOR = re.compile(r"[_\-.]")
+
+# Very common words carry almost no BM25 weight but have the longest postings lists
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i in is it its "
+    "of on or that the their there this to was what when where which who why will with you".split()
+)
+
+def tokenize(text: str) -> Iterator[str]:
+    """
+    Lowercased terms for indexing and querying
+
+    Compound tokens are also emitted as their parts and joined form, so
+    "BIP-341", "BIP 341" and "BIP341" all match each other.
+    """
+    for match in _TOKEN.finditer(text.lower()):
+        token = match.group()
+        if token in STOPWORDS:
+            continue
+        yield token
+        parts = _TOKEN_SEPARATOR.split(token)
+        if len(parts) > 1:
+            yield from (part for part in parts if part not in STOPWORDS)
+            yield "".join(parts)
+
+class LexicalIndex:
+    """
+    In-memory BM25 index stored as compact postings arrays
+
+    Postings are laid out CSR-style: for term `t`, documents
+    `docs[offsets[t]:offsets[t + 1]]` occur with frequencies in the same
+    slice of `freqs`. A query touches only the postings of its own terms
+    and scores them in one vectorized pass.
+    """
+
+    def __init__(self, path: Path, arrays: Dict[str, np.ndarray], meta: Dict[str, Any], k1: float = 1.2, b: float = 0.75):
+        self.path = path
+        self.meta = meta
+        self.vocabulary = {term: i for i, term in enumerate(arrays["terms"].tolist())}
+        self.term_offsets = arrays["term_offsets"]
+        self.docs = arrays["docs"]
+        self.freqs = arrays["freqs"]
+        self.idf = arrays["idf"]
+        doc_lengths = arrays["doc_lengths"].astype(np.float32)
+        average_length = float(doc_lengths.mean()) if len(doc_lengths) else 1.0
+        self.k1 = k1
+        # Per-document length normalization, precomputed once: k1 * (1 - b + b * |d| / avgdl)
+        self.doc_norms = k1 * (1 - b + b * doc_lengths / max(average_length, 1e-9))
+        self.payloads = PayloadReader(path / PAYLOADS_FILE, arrays["payload_offsets"])
+
+    @classmethod
+    def open(cls, path: str) -> "LexicalIndex":
+        """Load an index directory written by `LexicalIndexBuilder`"""
+        index_path = Path(path)
+        with open(index_path / META_FILE, "r") as f:
+            meta = json.load(f)
+        with np.load(index_path / POSTINGS_FILE) as data:
+            arrays = {name: data[name] for name in data.files}
+        return cls(index_path, arrays, meta)
+
+    @staticmethod
+    def exists(path: Optional[str]) -> bool:
+        return bool(path) and (Path(path) / META_FILE).exists()
+
+    def __len__(self) -> int:
+        return len(self.doc_norms)
+
+    def search(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Return the `limit` best BM25 matches for a query"""
+        term_ids = {self.vocabulary[term] for term in tokenize(query) if term in self.vocabulary}
+        if not term_ids or limit <= 0:
+            return []
+
+        doc_slices = []
+        score_slices = []
+        for term_id in term_ids:
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            docs = self.docs[start:end]
+            freqs = self.freqs[start:end].astype(np.float32)
+            doc_slices.append(docs)
+            score_slices.append(self.idf[term_id] * freqs * (self.k1 + 1) / (freqs + self.doc_norms[docs]))
+
+        # Sum per-term contributions for each matching document
+        candidates, inverse = np.unique(np.concatenate(doc_slices), return_inverse=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_slices))
+
+        k = min(limit, len(candidates))
+        top = np.argpartition(scores, len(scores) - k)[len(scores) - k:]
+        top = top[np.argsort(scores[top])[::-1]]
+
+        results = []
+        for i in top:
+            payload = self.payloads.read(int(candidates[i]))
+            results.append({
+                "id": payload.get("id"),
+                "content": payload.get("content", ""),
+                "citation": payload.get("citation", ""),
+                "source": payload.get("source", ""),
+                "score": float(scores[i])
+            })
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self),
+            "terms": len(self.vocabulary),
+            "postings": int(len(self.docs))
+        }
+
+    def close(self):
+        self.payloads.close()
+
+class LexicalIndexBuilder:
+    """Accumulates postings while documents stream past, then writes a `LexicalIndex` directory"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.vocabulary: Dict[str, int] = {}
+        self._docs: List[array] = []
+        self._freqs: List[array] = []
+        self._doc_lengths = array("i")
+        self._payloads = PayloadWriter(self.path / PAYLOADS_FILE)
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def add(self, text: str, payload: Dict[str, Any]):
+        doc = len(self._doc_lengths)
+        counts = Counter(tokenize(text))
+        self._doc_lengths.append(sum(counts.values()))
+        for term, freq in counts.items():
+            term_id = self.vocabulary.setdefault(term, len(self.vocabulary))
+            if term_id == len(self._docs):
+                self._docs.append(array("i"))
+                self._freqs.append(array("H"))
+            self._docs[term_id].append(doc)
+            self._freqs[term_id].append(min(freq, 65535))
+        self._payloads.write(payload)
+
+    def finish(self):
+        """Flatten postings into CSR arrays and write them with precomputed IDF"""
+        document_count = len(self._doc_lengths)
+        frequencies = np.fromiter((len(docs) for docs in self._docs), dtype=np.int64, count=len(self._docs))
+        term_offsets = np.zeros(len(self._docs) + 1, dtype=np.int64)
+        np.cumsum(frequencies, out=term_offsets[1:])
+        idf = np.log(1 + (document_count - frequencies + 0.5) / (frequencies + 0.5)).astype(np.float32)
+
+        docs = np.empty(int(term_offsets[-1]), dtype=np.int32)
+        freqs = np.empty(int(term_offsets[-1]), dtype=np.uint16)
+        for term_id, (term_docs, term_freqs) in enumerate(zip(self._docs, self._freqs)):
+            start, end = term_offsets[term_id], term_offsets[term_id + 1]
+            docs[start:end] = np.frombuffer(term_docs, dtype=np.int32)
+            freqs[start:end] = np.frombuffer(term_freqs, dtype=np.uint16)
+
+        payload_offsets = self._payloads.finish()
+        tmp_path = self.path / f"{POSTINGS_FILE}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                terms=np.array(list(self.vocabulary), dtype=str),
+                term_offsets=term_offsets,
+                docs=docs,
+                freqs=freqs,
+                idf=idf,
+                doc_lengths=np.frombuffer(self._doc_lengths, dtype=np.int32),
+                payload_offsets=payload_offsets
+            )
+        os.replace(tmp_path, self.path / POSTINGS_FILE)
+
+        with open(self.path / META_FILE, "w") as f:
+            json.dump({"documents": document_count, "terms": len(self.vocabulary)}, f, indent=2)
@@ -0,0 +1,232 @@
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+import json
+import os
+import numpy as np
+from app.db.payload_store import PayloadReader, PayloadWriter
+
+VECTORS_FILE = "vectors.npy"
+PAYLOADS_FILE = "payloads.jsonl"
+OFFSETS_FILE = "offsets.npy"
+META_FILE = "meta.json"
+
+# Rows widened to float32 per matrix-vector product when the matrix is float16
+SEARCH_BLOCK_ROWS = 4096
+
+# Rows copied at a time when finalizing a written index
+COPY_BLOCK_ROWS = 65536
+
+class LocalVectorIndex:
+    """
+    In-process exact cosine search over a memory-mapped embedding matrix
+
+    Vectors are stored L2-normalized as one contiguous float32/float16
+    `.npy` matrix, so a search is a matrix-vector product followed by an
+    `argpartition` top-k. Payloads live in a JSONL sidecar and only the
+    top-k rows are read back, via byte offsets, so neither the matrix nor
+    the payloads have to fit in memory.
+    """
+
+    def __init__(self, path: Path, vectors: np.ndarray, offsets: np.ndarray, meta: Dict[str, Any]):
+        self.path = path
+        self.vectors = vectors
+        self.offsets = offsets
+        self.meta = meta
+        self.payloads = PayloadReader(path / PAYLOADS_FILE, offsets)
+
+    @classmethod
+    def open(cls, path: str) -> "LocalVectorIndex":
+        """Memory-map an index directory written by `LocalIndexWriter`"""
+        index_path = Path(path)
+        with open(index_path / META_FILE, "r") as f:
+            meta = json.load(f)
+        vectors = np.load(index_path / VECTORS_FILE, mmap_mode="r")
+        offsets = np.load(index_path / OFFSETS_FILE)
+        return cls(index_path, vectors, offsets, meta)
+
+    @staticmethod
+    def exists(path: Optional[str]) -> bool:
+        return bool(path) and (Path(path) / META_FILE).exists()
+
+    @property
+    def model_name(self) -> str:
+        return self.meta.get("model_name", "")
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    def search(self, query_vector: List[float], limit: int = 5) -> List[Dict[str, Any]]:
+        """Return the `limit` most similar payloads with their cosine scores"""
+        count = len(self)
+        if count == 0 or limit <= 0:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        if self.vectors.dtype == np.float32:
+            scores = self.vectors @ query
+        else:
+            # No BLAS kernel for float16: widen cache-sized blocks into a reused buffer
+            scores = np.empty(count, dtype=np.float32)
+            buffer = np.empty((min(SEARCH_BLOCK_ROWS, count), self.vectors.shape[1]), dtype=np.float32)
+            for start in range(0, count, SEARCH_BLOCK_ROWS):
+                block = self.vectors[start:start + SEARCH_BLOCK_ROWS]
+                rows = len(block)
+                np.copyto(buffer[:rows], block)
+                np.dot(buffer[:rows], query, out=scores[start:start + rows])
+
+        k = min(limit, count)
+        if k < count:
+            top = np.argpartition(scores, count - k)[count - k:]
+        else:
+            top = np.arange(count)
+        top = top[np.argsort(scores[top])[::-1]]
+
+        results = []
+        for row in top:
+            payload = self.payloads.read(int(row))
+            results.append({
+                "id": payload.get("id"),
+                "content": payload.get("content", ""),
+                "citation": payload.get("citation", ""),
+                "source": payload.get("source", ""),
+                "score": float(scores[row])
+            })
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self),
+            "dimensions": int(self.vectors.shape[1]) if self.vectors.ndim == 2 else 0,
+            "dtype": str(self.vectors.dtype),
+            "model_name": self.model_name
+        }
+
+    def close(self):
+        self.payloads.close()
+
+class EmbeddingArtifact:
+    """
+    Precomputed document embeddings looked up by content hash
+
+    An artifact is a `LocalVectorIndex` directory whose payloads carry each
+    document's `content_hash`; it is tied to the model named in its
+    metadata. Ingestion reuses its vectors instead of running the model,
+    so a new environment can be bootstrapped by copying the directory.
+    """
+
+    def __init__(self, index: LocalVectorIndex):
+        self.index = index
+        self.rows = {
+            payload["content_hash"]: row
+            for row, payload in enumerate(index.payloads)
+            if payload.get("content_hash")
+        }
+        self.hits = 0
+
+    @classmethod
+    def open(cls, path: Optional[str], model_name: str) -> Optional["EmbeddingArtifact"]:
+        """Open an artifact, or return None if it is missing or built with another model"""
+        if not LocalVectorIndex.exists(path):
+            return None
+        index = LocalVectorIndex.open(path)
+        if index.model_name != model_name:
+            print(f"⚠️ Embeddings in {path} were built with {index.model_name}, not {model_name}; ignoring them")
+            index.close()
+            return None
+        return cls(index)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def get(self, content_hash: str) -> Optional[List[float]]:
+        row = self.rows.get(content_hash)
+        if row is None:
+            return None
+        self.hits += 1
+        return self.index.vectors[row].astype(np.float32).tolist()
+
+    def close(self):
+        self.index.close()
+
+class LocalIndexWriter:
+    """
+    Streams (vector, payload) rows to a `LocalVectorIndex` directory
+
+    Rows are appended to a raw scratch file as they arrive, so the row count
+    need not be known up front; `finish()` copies them into the final `.npy`
+    matrix and swaps the new index into place.
+    """
+
+    def __init__(self, path: str, model_name: str, dtype: str = "float32"):
+        self.path = Path(path)
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.dimensions: Optional[int] = None
+        self.count = 0
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._raw_path = self.path / f"{VECTORS_FILE}.raw"
+        self._raw = open(self._raw_path, "wb")
+        self._payloads = PayloadWriter(self.path / PAYLOADS_FILE)
+
+    def add(self, vectors: Iterable[List[float]], payloads: Iterable[Dict[str, Any]]):
+        """Append a batch of rows; vectors are L2-normalized before storage"""
+        matrix = np.asarray(list(vectors), dtype=np.float32)
+        if matrix.size == 0:
+            return
+        if self.dimensions is None:
+            self.dimensions = matrix.shape[1]
+        elif matrix.shape[1] != self.dimensions:
+            raise ValueError(f"Expected {self.dimensions}-dimensional vectors, got {matrix.shape[1]}")
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self._raw.write((matrix / norms).astype(self.dtype).tobytes())
+
+        for payload in payloads:
+            self._payloads.write(payload)
+        self.count += len(matrix)
+
+    def abort(self):
+        """Discard the rows written so far, leaving any existing index untouched"""
+        self._raw.close()
+        self._payloads.abort()
+        self._raw_path.unlink(missing_ok=True)
+        # Scratch files of a finish() that failed part-way
+        for name in (VECTORS_FILE, OFFSETS_FILE):
+            (self.path / f"{name}.tmp").unlink(missing_ok=True)
+
+    def finish(self):
+        """Write the final matrix, offsets and metadata"""
+        self._raw.close()
+        if len(self._payloads) != self.count:
+            raise ValueError("Number of payloads does not match number of vectors")
+
+        dimensions = self.dimensions or 0
+        raw = np.memmap(self._raw_path, dtype=self.dtype, mode="r", shape=(self.count, dimensions)) if self.count else None
+        matrix = np.lib.format.open_memmap(
+            self.path / f"{VECTORS_FILE}.tmp", mode="w+", dtype=self.dtype, shape=(self.count, dimensions)
+        )
+        for start in range(0, self.count, COPY_BLOCK_ROWS):
+            matrix[start:start + COPY_BLOCK_ROWS] = raw[start:start + COPY_BLOCK_ROWS]
+        matrix.flush()
+        del matrix, raw
+        self._raw_path.unlink()
+
+        offsets = self._payloads.finish()
+        with open(self.path / f"{OFFSETS_FILE}.tmp", "wb") as f:
+            np.save(f, offsets)
+        os.replace(self.path / f"{OFFSETS_FILE}.tmp", self.path / OFFSETS_FILE)
+        os.replace(self.path / f"{VECTORS_FILE}.tmp", self.path / VECTORS_FILE)
+
+        meta = {
+            "model_name": self.model_name,
+            "dimensions": dimensions,
+            "dtype": self.dtype.name,
+            "count": self.count
+        }
+        with open(self.path / META_FILE, "w") as f:
+            json.dump(meta, f, indent=2)
@@ -0,0 +1,136 @@
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+from app.db.postgres import postgres_client
+from app.config import settings
+import asyncio
+
+class ChatMessageWriter:
+    """
+    Write-behind persistence for chat messages
+
+    In "async" mode messages are enqueued and a background task flushes
+    them in multi-row batches, keeping the database off the chat response
+    path. When the queue is full, or in "sync" mode, messages are written
+    immediately. Pending messages are flushed on shutdown.
+    """
+
+    def __init__(
+        self,
+        mode: str = "async",
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        max_queue_size: int = 10000
+    ):
+        self.postgres = postgres_client
+        self.mode = mode
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self.flushed = 0
+        self.failed = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the background flush loop"""
+        if self.mode != "async":
+            return
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write everything still queued"""
+        if self._task is not None and not self._task.done():
+            # The sentinel lets the loop finish its current batch before exiting
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+        if self._queue:
+            while not self._queue.empty():
+                batch, _ = self._drain(self.batch_size)
+                await self._flush(batch)
+
+    async def save(self, session_id: str, role: str, content: str, citations: List[str] = None):
+        """Persist a chat message, write-behind when the background writer is running"""
+        message = (session_id, role, content, citations or [], datetime.now())
+
+        if self._task is not None and not self._task.done():
+            try:
+                self._queue.put_nowait(message)
+                return True
+            except asyncio.QueueFull:
+                print("⚠️ Chat message queue full, writing synchronously")
+
+        return await self.postgres.save_chat_messages([message])
+
+    def _drain(self, limit: int) -> Tuple[List[Tuple], bool]:
+        """Take up to `limit` queued messages; also report whether the stop sentinel was seen"""
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            message = self._queue.get_nowait()
+            if message is None:
+                return batch, True
+            batch.append(message)
+        return batch, False
+
+    async def _flush(self, batch: List[Tuple]):
+        if not batch:
+            return
+        if await self.postgres.save_chat_messages(batch):
+            self.flushed += len(batch)
+            return
+
+        # The multi-row insert is atomic, so one bad row fails the whole batch;
+        # split it (while the database is up) until only the bad rows are left
+        if len(batch) > 1 and await self._database_reachable():
+            middle = len(batch) // 2
+            await self._flush(batch[:middle])
+            await self._flush(batch[middle:])
+            return
+
+        self.failed += len(batch)
+        for session_id, role, content, _, created_at in batch:
+            print(f"⚠️ Dropped chat message (session={session_id}, role={role}, created_at={created_at}): {content[:80]!r}")
+
+    async def _database_reachable(self) -> bool:
+        try:
+            return await self.postgres.ping()
+        except Exception:
+            return False
+
+    async def _run(self):
+        while True:
+            # Block for the first message, then give the batch a moment to fill
+            first = await self._queue.get()
+            if first is None:
+                return
+            if self._queue.qsize() < self.batch_size - 1:
+                await asyncio.sleep(self.flush_interval)
+            rest, stopping = self._drain(self.batch_size - 1)
+            batch = [first] + rest
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                print(f"Chat message flush error: {e}")
+                self.failed += len(batch)
+            if stopping:
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and write counters for health reporting"""
+        return {
+            "mode": self.mode,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "max_queue_size": self.max_queue_size,
+            "flushed": self.flushed,
+            "failed": self.failed
+        }
+
+# Global writer instance
+message_writer = ChatMessageWriter(
+    mode=settings.chat_persistence_mode,
+    batch_size=settings.chat_persistence_batch_size,
+    flush_interval=settings.chat_persistence_flush_interval,
+    max_queue_size=settings.chat_persistence_queue_size
+)
@@ -0,0 +1,62 @@
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+import json
+import os
+import numpy as np
+
+class PayloadWriter:
+    """
+    Appends payload dicts to a JSONL file, recording each row's byte offset
+
+    Rows are written to a temporary file that replaces `path` on `finish()`,
+    so readers of a previous version are never handed a partial file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self._file = open(self._tmp_path, "wb")
+        self._offsets: List[int] = [0]
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def write(self, payload: Dict[str, Any]):
+        line = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+        self._file.write(line)
+        self._offsets.append(self._offsets[-1] + len(line))
+
+    def abort(self):
+        """Discard everything written so far"""
+        self._file.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+    def finish(self) -> np.ndarray:
+        """Move the file into place and return the row offsets (one more than the row count)"""
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        return np.asarray(self._offsets, dtype=np.int64)
+
+class PayloadReader:
+    """Random access to rows of a JSONL payload file by row number"""
+
+    def __init__(self, path: Path, offsets: np.ndarray):
+        self.path = Path(path)
+        self.offsets = offsets
+        self._fd = os.open(path, os.O_RDONLY)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Read every row in order with buffered sequential I/O"""
+        with open(self.path, "rb") as f:
+            for line in f:
+                yield json.loads(line)
+
+    def read(self, row: int) -> Dict[str, Any]:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        # pread is positionless, so concurrent searches can share the descriptor
+        return json.loads(os.pread(self._fd, end - start, start))
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -1,59 +1,214 @@
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from typing import List, Dict, Any, Optional
+import asyncpg
+from typing import List, Dict, Any, Optional, Tuple
 from app.config import settings
+from datetime import datetime
+import asyncio
 import json
 
+async def _init_connection(conn):
+    """Decode JSON/JSONB columns to Python objects on every pooled connection"""
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(
+            type_name,
+            encoder=json.dumps,
+            decoder=json.loads,
+            schema="pg_catalog"
+        )
+
 class PostgreSQLClient:
     def __init__(self):
         self.connection_url = settings.database_url
-        
+        self.pool: Optional[asyncpg.Pool] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+
+    async def connect(self):
+        """Create the connection pool (called from the app lifespan)"""
+        if self.pool is not None:
+            return self.pool
+        # Created on first use so it belongs to the running event loop
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        # Concurrent first callers (lifespan, message writer, price sync) must share one pool
+        async with self._connect_lock:
+            if self.pool is None:
+                self.pool = await asyncpg.create_pool(
+                    self.connection_url,
+                    min_size=settings.db_pool_min_size,
+                    max_size=settings.db_pool_max_size,
+                    statement_cache_size=settings.db_statement_cache_size,
+                    command_timeout=settings.db_command_timeout,
+                    init=_init_connection
+                )
+        return self.pool
+
+    async def close(self):
+        """Close the connection pool"""
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
     def get_connection(self):
-        """Get database connection"""
-        return psycopg2.connect(self.connection_url, cursor_factory=RealDictCursor)
-    
+        """Acquire a pooled connection (use as `async with`)"""
+        if self.pool is None:
+            raise RuntimeError("PostgreSQL pool is not initialized")
+        return self.pool.acquire(timeout=settings.db_acquire_timeout)
+
+    async def _ensure_pool(self):
+        # Scripts use the client without the app lifespan, so connect lazily
+        if self.pool is None:
+            await self.connect()
+
     async def execute_query(self, query: str, params: tuple = None) -> List[Dict[str, Any]]:
         """Execute a SELECT query and return results"""
         try:
-            with self.get_connection() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(query, params or ())
-                    return [dict(row) for row in cur.fetchall()]
+            await self._ensure_pool()
+            async with self.get_connection() as conn:
+                rows = await conn.fetch(query, *(params or ()))
+                return [dict(row) for row in rows]
         except Exception as e:
             print(f"Query error: {e}")
             return []
-    
+
     async def execute_command(self, command: str, params: tuple = None) -> bool:
         """Execute an INSERT/UPDATE/DELETE command"""
         try:
-            with self.get_connection() as conn:
-                with conn.cursor() as cur:
-                    cur.execute(command, params or ())
-                    conn.commit()
-                    return True
+            await self._ensure_pool()
+            async with self.get_connection() as conn:
+                await conn.execute(command, *(params or ()))
+                return True
         except Exception as e:
             print(f"Command error: {e}")
             return False
-    
+
+    async def ping(self) -> bool:
+        """Round-trip a trivial query through the pool; raises on failure"""
+        await self._ensure_pool()
+        async with self.get_connection() as conn:
+            await conn.fetchval("SELECT 1")
+        return True
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Current pool occupancy for health reporting"""
+        if self.pool is None:
+            return {"initialized": False}
+        return {
+            "initialized": True,
+            "size": self.pool.get_size(),
+            "idle": self.pool.get_idle_size(),
+            "min_size": self.pool.get_min_size(),
+            "max_size": self.pool.get_max_size()
+        }
+
     async def save_chat_message(self, session_id: str, role: str, content: str, citations: List[str] = None):
         """Save chat message to database"""
         command = """
         INSERT INTO chat_messages (session_id, role, content, citations)
-        VALUES (%s, %s, %s, %s)
+        VALUES ($1, $2, $3, $4)
         """
-        citations_json = json.dumps(citations or [])
-        return await self.execute_command(command, (session_id, role, content, citations_json))
-    
+        return await self.execute_command(command, (session_id, role, content, citations or []))
+
+    async def save_chat_messages(self, messages: List[Tuple[str, str, str, List[str], datetime]]) -> bool:
+        """Insert a batch of (session_id, role, content, citations, created_at) rows in one round trip"""
+        if not messages:
+            return True
+        try:
+            await self._ensure_pool()
+            async with self.get_connection() as conn:
+                await conn.executemany(
+                    """
+                    INSERT INTO chat_messages (session_id, role, content, citations, created_at)
+                    VALUES ($1, $2, $3, $4, $5)
+                    """,
+                    [(session_id, role, content, citations or [], created_at)
+                     for session_id, role, content, citations, created_at in messages]
+                )
+                return True
+        except Exception as e:
+            print(f"Batch insert error: {e}")
+            return False
+
     async def get_chat_history(self, session_id: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Get chat history for a session"""
         query = """
         SELECT role, content, citations, created_at
         FROM chat_messages
-        WHERE session_id = %s
+        WHERE session_id = $1
         ORDER BY created_at ASC
-        LIMIT %s
+        LIMIT $2
         """
         return await self.execute_query(query, (session_id, limit))
 
+    async def get_recent_chat_history(
+        self,
+        session_id: str,
+        limit: int = 20,
+        before: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Get the latest `limit` messages for a session (optionally created before a time), oldest first"""
+        query = """
+        SELECT role, content, created_at FROM (
+            SELECT role, content, created_at
+            FROM chat_messages
+            WHERE session_id = $1 AND ($3::timestamp IS NULL OR created_at < $3)
+            ORDER BY created_at DESC
+            LIMIT $2
+        ) recent
+        ORDER BY created_at ASC
+        """
+        return await self.execute_query(query, (session_id, limit, before))
+
+    async def get_latest_price_bucket(self, symbol: str, resolution: str) -> Optional[int]:
+        """Start (ms) of the newest stored bucket for a price series, or None if it is empty; raises on failure"""
+        # Not via execute_query: an outage must not look like an empty table (and trigger a full backfill)
+        await self._ensure_pool()
+        async with self.get_connection() as conn:
+            return await conn.fetchval(
+                "SELECT MAX(bucket_ms) FROM price_history WHERE symbol = $1 AND resolution = $2",
+                symbol, resolution
+            )
+
+    async def save_price_points(self, points: List[Tuple[str, str, int, int, float, Optional[float], Optional[float]]]) -> bool:
+        """Upsert (symbol, resolution, bucket_ms, timestamp_ms, price, market_cap, total_volume) rows in one round trip"""
+        if not points:
+            return True
+        try:
+            await self._ensure_pool()
+            async with self.get_connection() as conn:
+                await conn.executemany(
+                    """
+                    INSERT INTO price_history (symbol, resolution, bucket_ms, timestamp_ms, price, market_cap, total_volume)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7)
+                    ON CONFLICT (symbol, resolution, bucket_ms) DO UPDATE SET
+                        timestamp_ms = EXCLUDED.timestamp_ms,
+                        price = EXCLUDED.price,
+                        market_cap = EXCLUDED.market_cap,
+                        total_volume = EXCLUDED.total_volume
+                    WHERE EXCLUDED.timestamp_ms >= price_history.timestamp_ms
+                    """,
+                    points
+                )
+                return True
+        except Exception as e:
+            print(f"Price history insert error: {e}")
+            return False
+
+    async def delete_price_points_before(self, symbol: str, resolution: str, before_ms: int) -> bool:
+        """Delete points of a price series in buckets older than `before_ms` (range scan on the primary key)"""
+        command = """
+        DELETE FROM price_history
+        WHERE symbol = $1 AND resolution = $2 AND bucket_ms < $3
+        """
+        return await self.execute_command(command, (symbol, resolution, before_ms))
+
+    async def get_price_points(self, symbol: str, resolution: str, since_ms: int) -> List[Dict[str, Any]]:
+        """Get a price series from `since_ms` onwards, oldest first (range scan on the primary key)"""
+        query = """
+        SELECT timestamp_ms, price, market_cap, total_volume
+        FROM price_history
+        WHERE symbol = $1 AND resolution = $2 AND bucket_ms >= $3
+        ORDER BY bucket_ms ASC
+        """
+        return await self.execute_query(query, (symbol, resolution, since_ms))
+
 # Global client instance
-postgres_client = PostgreSQLClient()
\ No newline at end of file
+postgres_client = PostgreSQLClient()
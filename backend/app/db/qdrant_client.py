@@ -1,9 +1,14 @@
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from app.config import settings
+from app.core.embedding_batcher import EmbeddingBatcher
+from app.core.embedding_cache import EmbeddingCache
+from app.core.embedding_backends import SAMPLE_TEXTS, load_embedding_model, parity
+from app.db.local_vector_index import LocalVectorIndex
 import asyncio
 import os
+import time
 
 # Try to import sentence transformers, fall back gracefully if not available
 try:
@@ -18,23 +23,51 @@ class QdrantVectorDB:
     def __init__(self):
         self.client = None
         self.model = None
+        self.embedder = None
+        self.embedding_backend = None
+        self.embedding_parity: Optional[float] = None
+        self.query_cache = EmbeddingCache(
+            model_name=settings.embedding_model,
+            max_size=settings.embedding_cache_size,
+            ttl_seconds=settings.embedding_cache_ttl,
+            persist_path=settings.embedding_cache_path
+        )
+        # Optional exact-text cache for document embeddings (set by ingestion)
+        self.document_cache = None
+        # In-process index used when Qdrant is unavailable or not deployed
+        self.local_index: Optional[LocalVectorIndex] = None
         self.collection_name = "bitcoin_knowledge"
+        self.search_params = self._search_params()
         self.rag_enabled = SENTENCE_TRANSFORMERS_AVAILABLE and os.getenv("RAG_ENABLED", "true").lower() == "true"
         
     async def initialize(self):
         """Initialize Qdrant client and embedding model"""
         try:
-            # Initialize Qdrant client
-            qdrant_host = settings.qdrant_url.replace("http://", "").replace("https://", "")
-            if ":" in qdrant_host:
-                host, port = qdrant_host.split(":")
-                self.client = QdrantClient(host=host, port=int(port))
-            else:
-                self.client = QdrantClient(host=qdrant_host, port=6333)
+            # Initialize async Qdrant client (pooled HTTP or gRPC transport),
+            # unless serving only from the in-process index
+            if settings.vector_backend != "local":
+                self.client = AsyncQdrantClient(
+                    url=settings.qdrant_url,
+                    prefer_grpc=settings.qdrant_prefer_grpc,
+                    grpc_port=settings.qdrant_grpc_port,
+                    timeout=settings.qdrant_timeout
+                )
             
             # Initialize embedding model only if available
             if self.rag_enabled and SENTENCE_TRANSFORMERS_AVAILABLE:
-                self.model = SentenceTransformer(settings.embedding_model)
+                await self._load_model()
+                self.embedder = EmbeddingBatcher(
+                    self.model,
+                    max_batch_size=settings.embedding_batch_size,
+                    max_wait_ms=settings.embedding_batch_wait_ms
+                )
+                if settings.embedding_warmup:
+                    # Pay lazy-init costs (thread pools, kernels) on the encoder thread before the first query
+                    started = time.perf_counter()
+                    await self.embedder.encode_many(SAMPLE_TEXTS)
+                    print(f"🔥 Embedding model warmed up in {(time.perf_counter() - started) * 1000:.0f}ms")
+                self.query_cache.load()
+                self._open_local_index()
                 print("✅ Qdrant vector database initialized with RAG")
             else:
                 print("✅ Qdrant vector database initialized (RAG disabled)")
@@ -44,44 +77,164 @@ class QdrantVectorDB:
             print("Vector database will be initialized when Qdrant is ready")
             self.rag_enabled = False
     
+    async def _load_model(self):
+        """Load the embedding model on the configured backend, verifying parity with fp32"""
+        name, backend, threads = settings.embedding_model, settings.embedding_backend, settings.embedding_threads
+        loop = asyncio.get_running_loop()
+        
+        try:
+            model = await loop.run_in_executor(
+                None, load_embedding_model, name, backend, threads, settings.embedding_onnx_cache_dir
+            )
+        except Exception as e:
+            print(f"⚠️ {backend} embedding backend unavailable ({e}), using torch")
+            backend = "torch"
+            model = await loop.run_in_executor(None, load_embedding_model, name, backend, threads)
+        
+        if backend != "torch" and settings.embedding_parity_check:
+            # Stored vectors come from the fp32 model, so queries must stay close to it
+            reference = await loop.run_in_executor(None, load_embedding_model, name, "torch", threads)
+            self.embedding_parity = await loop.run_in_executor(None, parity, model, reference)
+            if self.embedding_parity < settings.embedding_parity_min_cosine:
+                print(
+                    f"⚠️ {backend} embeddings diverge from fp32 (min cosine {self.embedding_parity:.4f} < "
+                    f"{settings.embedding_parity_min_cosine}), using torch"
+                )
+                model, backend = reference, "torch"
+            else:
+                print(f"✅ {backend} embeddings match fp32 (min cosine {self.embedding_parity:.4f})")
+            del reference
+        
+        self.model = model
+        self.embedding_backend = backend
+    
+    @staticmethod
+    def _search_params() -> models.SearchParams:
+        """Query-time HNSW and quantization parameters matching the collection layout"""
+        quantization = None
+        if settings.qdrant_quantization != "none":
+            quantization = models.QuantizationSearchParams(
+                rescore=settings.qdrant_search_rescore,
+                oversampling=settings.qdrant_search_oversampling
+            )
+        return models.SearchParams(hnsw_ef=settings.qdrant_search_hnsw_ef, quantization=quantization)
+    
+    def _open_local_index(self):
+        """Memory-map the in-process index if one has been built for this model"""
+        path = settings.local_index_path
+        if not LocalVectorIndex.exists(path):
+            if settings.vector_backend == "local":
+                print(f"⚠️ Local vector index not found at {path}")
+            return
+        
+        try:
+            index = LocalVectorIndex.open(path)
+        except Exception as e:
+            print(f"⚠️ Failed to open local vector index: {e}")
+            return
+        
+        if index.model_name != settings.embedding_model:
+            print(f"⚠️ Local vector index was built with {index.model_name}, not {settings.embedding_model}; ignoring it")
+            index.close()
+            return
+        
+        self.local_index = index
+        print(f"✅ Local vector index loaded ({len(index)} documents)")
+    
+    def _serve_locally(self) -> bool:
+        return self.local_index is not None and (settings.vector_backend == "local" or not self.client)
+    
+    async def _search_local(self, query_vector: List[float], limit: int) -> List[Dict[str, Any]]:
+        """Search the in-process index off the event loop, or return nothing if none is loaded"""
+        if self.local_index is None:
+            return []
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self.local_index.search, query_vector, limit)
+        except Exception as e:
+            print(f"Local vector search error: {e}")
+            return []
+    
     async def search_similar(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Search for similar content in the knowledge base"""
         if not self.rag_enabled:
             print("RAG disabled, returning empty results")
             return []
             
-        if not self.client or not self.model:
+        if not self.model or (not self.client and not self.local_index):
             print("Qdrant not initialized, returning empty results")
             return []
             
         try:
-            # Generate query embedding
-            query_vector = self.model.encode(query).tolist()
+            # Generate query embedding (cached, otherwise micro-batched off the loop)
+            query_vector = await self._embed(query, self.query_cache)
+        except Exception as e:
+            print(f"Query embedding error: {e}")
+            return []
+        
+        if self._serve_locally():
+            return await self._search_local(query_vector, limit)
             
+        try:
             # Search in Qdrant
-            search_results = self.client.search(
+            search_results = await self.client.search(
                 collection_name=self.collection_name,
                 query_vector=query_vector,
-                limit=limit
+                limit=limit,
+                search_params=self.search_params
             )
             
-            # Format results
-            results = []
-            for result in search_results:
-                results.append({
-                    "content": result.payload.get("content", ""),
-                    "citation": result.payload.get("citation", ""),
-                    "source": result.payload.get("source", ""),
-                    "score": result.score
-                })
-            
-            return results
+            return self._format_results(search_results)
             
         except Exception as e:
             print(f"Vector search error: {e}")
-            return []
+            # Qdrant is down: answer from the in-process index if one is loaded
+            return await self._search_local(query_vector, limit)
     
-    async def add_document(self, content: str, citation: str, source: str, doc_id: int):
+    async def search_batch(self, queries: List[str], limit: int = 5) -> List[List[Dict[str, Any]]]:
+        """Search for several queries in a single Qdrant round trip"""
+        if not self.rag_enabled or not self.model or (not self.client and not self.local_index):
+            return [[] for _ in queries]
+            
+        try:
+            # Concurrent embeds coalesce into one batched encode() call
+            query_vectors = await asyncio.gather(*(self._embed(q, self.query_cache) for q in queries))
+        except Exception as e:
+            print(f"Query embedding error: {e}")
+            return [[] for _ in queries]
+        
+        if self._serve_locally():
+            return list(await asyncio.gather(*(self._search_local(v, limit) for v in query_vectors)))
+            
+        try:
+            batch_results = await self.client.search_batch(
+                collection_name=self.collection_name,
+                requests=[
+                    models.SearchRequest(vector=vector, limit=limit, with_payload=True, params=self.search_params)
+                    for vector in query_vectors
+                ]
+            )
+            
+            return [self._format_results(results) for results in batch_results]
+            
+        except Exception as e:
+            print(f"Vector batch search error: {e}")
+            return list(await asyncio.gather(*(self._search_local(v, limit) for v in query_vectors)))
+    
+    def _format_results(self, search_results) -> List[Dict[str, Any]]:
+        """Convert Qdrant scored points to result dicts"""
+        results = []
+        for result in search_results:
+            results.append({
+                "id": str(result.id),
+                "content": result.payload.get("content", ""),
+                "citation": result.payload.get("citation", ""),
+                "source": result.payload.get("source", ""),
+                "score": result.score
+            })
+        return results
+    
+    async def add_document(self, content: str, citation: str, source: str, doc_id: str):
         """Add a document to the vector database"""
         if not self.rag_enabled:
             print("RAG disabled, skipping document addition")
@@ -92,10 +245,10 @@ class QdrantVectorDB:
             
         try:
             # Generate embedding
-            vector = self.model.encode(content).tolist()
+            vector = await self._embed(content, self.document_cache)
             
             # Add to Qdrant
-            self.client.upsert(
+            await self.client.upsert(
                 collection_name=self.collection_name,
                 points=[
                     models.PointStruct(
@@ -114,10 +267,97 @@ class QdrantVectorDB:
         except Exception as e:
             print(f"Document addition error: {e}")
             return False
+    
+    async def embed_documents(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        """Embed many documents in batched encode() calls, reusing the document cache"""
+        vectors: List[Optional[List[float]]] = [None] * len(texts)
+        missing = []
+        for i, text in enumerate(texts):
+            if self.document_cache is not None:
+                vectors[i] = self.document_cache.get(text)
+            if vectors[i] is None:
+                missing.append(i)
+        
+        if missing:
+            encoded = await self.embedder.encode_many([texts[i] for i in missing], batch_size=batch_size)
+            for i, vector in zip(missing, encoded):
+                vectors[i] = vector
+                if self.document_cache is not None:
+                    self.document_cache.put(texts[i], vector)
+        
+        return vectors
+    
+    async def upsert_documents(self, points: List[Dict[str, Any]]) -> bool:
+        """Upsert pre-embedded points ({"id", "vector", "payload"}) in one request"""
+        if not self.client or not points:
+            return False
+            
+        try:
+            await self.client.upsert(
+                collection_name=self.collection_name,
+                points=[
+                    models.PointStruct(id=point["id"], vector=point["vector"], payload=point["payload"])
+                    for point in points
+                ]
+            )
+            return True
+            
+        except Exception as e:
+            print(f"Batch upsert error: {e}")
+            return False
+    
+    async def delete_documents(self, doc_ids: List[str]) -> bool:
+        """Delete points by ID"""
+        if not self.client or not doc_ids:
+            return False
+            
+        try:
+            await self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=models.PointIdsList(points=doc_ids)
+            )
+            return True
+            
+        except Exception as e:
+            print(f"Document deletion error: {e}")
+            return False
+    
+    async def embed_query(self, query: str) -> Optional[List[float]]:
+        """Embed a user query through the query cache, or None if no model is loaded"""
+        if not self.rag_enabled or not self.embedder:
+            return None
+        return await self._embed(query, self.query_cache)
+    
+    async def _embed(self, text: str, cache: Optional[EmbeddingCache] = None) -> List[float]:
+        """Embed text, consulting and filling the given cache"""
+        if cache is not None:
+            vector = cache.get(text)
+            if vector is not None:
+                return vector
+        
+        vector = await self.embedder.encode(text)
+        
+        if cache is not None:
+            cache.put(text, vector)
+        return vector
+    
+    async def close(self):
+        """Release background resources"""
+        self.query_cache.save()
+        if self.local_index:
+            self.local_index.close()
+        if self.embedder:
+            await self.embedder.close()
+        if self.client:
+            await self.client.close()
 
 # Global vector DB instance
 vector_db = QdrantVectorDB()
 
 async def init_qdrant():
     """Initialize Qdrant vector database"""
-    await vector_db.initialize()
\ No newline at end of file
+    await vector_db.initialize()
+
+async def close_qdrant():
+    """Shut down Qdrant vector database resources"""
+    await vector_db.close()
\ No newline at end of file
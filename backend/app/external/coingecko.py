@@ -8,8 +8,8 @@ class CoinGeckoClient:
         self.base_url = settings.coingecko_base_url
         self.api_key = settings.coingecko_api_key
         
-    async def get_bitcoin_price(self) -> Optional[Dict[str, Any]]:
-        """Get current Bitcoin price and market data"""
+    async def get_bitcoin_price(self, fallback: bool = True) -> Optional[Dict[str, Any]]:
+        """Get current Bitcoin price and market data (demo data on failure unless fallback=False)"""
         try:
             # Prepare headers
             headers = {}
@@ -45,6 +45,9 @@ class CoinGeckoClient:
                     
         except Exception as e:
             print(f"CoinGecko API error: {e}")
+        
+        if not fallback:
+            return None
             
         # Fallback data if API fails
         return {
@@ -57,8 +60,8 @@ class CoinGeckoClient:
             "note": "Demo data - API unavailable"
         }
     
-    async def get_bitcoin_history(self, days: int = 30) -> Optional[Dict[str, Any]]:
-        """Get Bitcoin price history"""
+    async def get_bitcoin_history(self, days: int = 30, interval: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Get Bitcoin price history (daily points beyond one day, hourly within it, unless `interval` is given)"""
         try:
             headers = {}
             if self.api_key:
@@ -68,7 +71,7 @@ class CoinGeckoClient:
             params = {
                 "vs_currency": "usd",
                 "days": str(days),
-                "interval": "daily" if days > 1 else "hourly"
+                "interval": interval or ("daily" if days > 1 else "hourly")
             }
             
             async with httpx.AsyncClient(timeout=15.0) as client:
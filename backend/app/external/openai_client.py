@@ -1,46 +1,91 @@
-from openai import AsyncOpenAI
-from typing import List, Optional
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError, APITimeoutError
+from typing import AsyncIterator, Dict, List, Optional, Union
 from app.config import settings
+from app.core.circuit_breaker import CircuitBreaker
+
+def is_provider_failure(error: Exception) -> bool:
+    """Whether an error reflects provider health (timeouts, 429s, 5xx) rather than a bad request"""
+    if isinstance(error, (APITimeoutError, APIConnectionError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
 
 class OpenAIClient:
     def __init__(self):
         self.client = AsyncOpenAI(api_key=settings.openai_api_key)
         self.model = settings.openai_model
+        self.breaker = CircuitBreaker(
+            name="openai",
+            failure_threshold=settings.llm_breaker_failure_threshold,
+            recovery_timeout=settings.llm_breaker_recovery_timeout
+        )
         
     async def generate_response(
         self, 
         system_prompt: str, 
         user_message: str, 
         context: List[str] = None,
-        temperature: float = None
-    ) -> str:
-        """Generate response from OpenAI GPT-4"""
+        temperature: float = None,
+        stream: bool = False,
+        history: List[Dict[str, str]] = None
+    ) -> Union[str, AsyncIterator[str]]:
+        """Generate response from OpenAI GPT-4
+
+        `history` holds prior {"role", "content"} turns placed between the
+        system prompt and the new user message. With stream=True, returns an
+        async iterator of content deltas instead of the full completion text.
+        """
         try:
             # Build system prompt with context
             if context:
                 context_text = "\n\n".join(context)
                 system_prompt += f"\n\nKNOWLEDGE BASE CONTEXT:\n{context_text}"
             
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ]
+            messages = [{"role": "system", "content": system_prompt}]
+            messages.extend(history or [])
+            messages.append({"role": "user", "content": user_message})
             
             response = await self.client.chat.completions.create(
                 model=self.model,
                 messages=messages,
                 temperature=temperature or settings.openai_temperature,
-                max_tokens=settings.max_tokens
+                max_tokens=settings.max_tokens,
+                stream=stream
             )
             
+            if stream:
+                return self._iter_stream(response)
+            
+            self.breaker.record_success()
             return response.choices[0].message.content
             
         except Exception as e:
             print(f"OpenAI API error: {e}")
-            return f"I'm having trouble processing your request. Please try again. (Error: {str(e)})"
+            self._record_failure(e)
+            raise
+    
+    async def _iter_stream(self, response) -> AsyncIterator[str]:
+        """Yield content deltas from a streamed chat completion"""
+        try:
+            async for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+        except Exception as e:
+            self._record_failure(e)
+            raise
+        self.breaker.record_success()
+    
+    def _record_failure(self, error: Exception):
+        """Feed provider-side failures into the circuit breaker"""
+        if is_provider_failure(error):
+            self.breaker.record_failure(f"{type(error).__name__}: {error}")
     
     async def is_available(self) -> bool:
-        """Check if OpenAI API is available"""
+        """Check if OpenAI API is available (full round trip - keep off the request path)"""
         try:
             await self.client.models.list()
             return True
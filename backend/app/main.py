@@ -2,8 +2,12 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
-from app.core.database import init_db
-from app.db.qdrant_client import init_qdrant
+from app.core.database import init_db, close_db
+from app.db.qdrant_client import init_qdrant, close_qdrant
+from app.services.rag_service import rag_service
+from app.db.message_writer import message_writer
+from app.services.llm_health import llm_health_monitor
+from app.services.price_poller import price_poller
 from app.api.router import api_router
 
 @asynccontextmanager
@@ -12,9 +16,19 @@ async def lifespan(app: FastAPI):
     print("🚀 Starting Bitcoin ChatGPT Backend...")
     await init_db()
     await init_qdrant()
+    await rag_service.initialize()
+    await message_writer.start()
+    await llm_health_monitor.start()
+    await price_poller.start()
     print("✅ Backend services initialized")
     yield
     print("🛑 Backend shutting down")
+    await price_poller.stop()
+    await llm_health_monitor.stop()
+    await rag_service.close()
+    await close_qdrant()
+    await message_writer.stop()
+    await close_db()
 
 # Create FastAPI application
 app = FastAPI(
@@ -31,6 +45,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
 # Include API routes
@@ -45,7 +60,9 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "chat": "/api/chat/message",
+            "chat_stream": "/api/chat/stream",
             "prices": "/api/prices/current",
+            "price_stream": "/api/prices/stream",
             "news": "/api/news/latest",
             "health": "/api/health"
         }
@@ -7,13 +7,15 @@ class ChatRequest(BaseModel):
     message: str
     session_id: Optional[str] = "default"
     use_rag: bool = True
+    bypass_cache: bool = False  # skip the semantic answer cache
     
     class Config:
         json_schema_extra = {
             "example": {
                 "message": "What is Bitcoin?",
                 "session_id": "user_123",
-                "use_rag": True
+                "use_rag": True,
+                "bypass_cache": False
             }
         }
 
@@ -22,7 +24,7 @@ class ChatResponse(BaseModel):
     message: str
     citations: List[str] = []
     session_id: str
-    model_used: Optional[str] = None
+    model_used: Optional[str] = None  # "openai", "fallback" or "cache"
     timestamp: datetime = datetime.now()
     
     class Config:
@@ -10,6 +10,7 @@ class PriceData(BaseModel):
     total_volume: Optional[float] = None
     price_change_percentage_24h: Optional[float] = None
     last_updated: Optional[datetime] = None
+    stale: bool = False  # True when upstream refreshes are failing and this is the last good value
     
     class Config:
         json_schema_extra = {
@@ -29,6 +30,7 @@ class PriceHistory(BaseModel):
     prices: List[List[float]]  # [[timestamp, price], ...]
     market_caps: Optional[List[List[float]]] = None
     total_volumes: Optional[List[List[float]]] = None
+    stale: bool = False
     
     class Config:
         json_schema_extra = {
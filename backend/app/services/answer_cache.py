@@ -0,0 +1,164 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+from app.db.qdrant_client import vector_db
+from app.config import settings
+import hashlib
+import time
+
+import numpy as np
+
+@dataclass
+class CachedAnswer:
+    """A previously generated answer and the context it was grounded on"""
+    question: str
+    answer: str
+    citations: List[str]
+    context_key: str
+    stored_at: float
+
+def context_fingerprint(context: List[str]) -> str:
+    """Stable key for the RAG context an answer was generated from"""
+    digest = hashlib.sha256()
+    for passage in context or []:
+        digest.update(passage.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+class SemanticAnswerCache:
+    """
+    Cache of LLM answers looked up by question similarity
+
+    A new question hits when its embedding is within `threshold` cosine
+    similarity of a previously answered question *and* retrieval produced
+    the same context, so paraphrases of a common question reuse the answer
+    without another OpenAI call. Entries live in a fixed-size matrix slot
+    table with LRU and TTL eviction. The cache fails open: an embedding or
+    cache error is logged and treated as a miss (or a skipped store).
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        max_size: int = 2000,
+        ttl_seconds: float = 3600.0,
+        enabled: bool = True
+    ):
+        self.vector_db = vector_db
+        self.threshold = threshold
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: "OrderedDict[int, CachedAnswer]" = OrderedDict()
+        self._free_slots = list(range(max_size - 1, -1, -1))
+
+    async def lookup(self, question: str, context: List[str]) -> Optional[CachedAnswer]:
+        """Return a cached answer for a near-duplicate question, if any"""
+        if not self.enabled or not self._entries:
+            self.misses += 1
+            return None
+
+        try:
+            return await self._lookup(question, context)
+        except Exception as e:
+            print(f"Answer cache lookup error: {e}")
+            self.errors += 1
+            self.misses += 1
+            return None
+
+    async def _lookup(self, question: str, context: List[str]) -> Optional[CachedAnswer]:
+        query_vector = await self.vector_db.embed_query(question)
+        if query_vector is None:
+            self.misses += 1
+            return None
+
+        context_key = context_fingerprint(context)
+        slots = np.fromiter(self._entries.keys(), dtype=np.int64)
+        scores = self._vectors[slots] @ self._unit(query_vector)
+        now = time.time()
+
+        for idx in np.argsort(-scores):
+            if scores[idx] < self.threshold:
+                break
+            slot = int(slots[idx])
+            entry = self._entries[slot]
+            if now - entry.stored_at >= self.ttl_seconds:
+                self._evict(slot)
+                continue
+            if entry.context_key == context_key:
+                self._entries.move_to_end(slot)
+                self.hits += 1
+                return entry
+
+        self.misses += 1
+        return None
+
+    async def store(self, question: str, context: List[str], answer: str, citations: List[str]):
+        """Remember an answer generated by the LLM"""
+        if not self.enabled:
+            return
+
+        try:
+            await self._store(question, context, answer, citations)
+        except Exception as e:
+            print(f"Answer cache store error: {e}")
+            self.errors += 1
+
+    async def _store(self, question: str, context: List[str], answer: str, citations: List[str]):
+        query_vector = await self.vector_db.embed_query(question)
+        if query_vector is None:
+            return
+
+        vector = self._unit(query_vector)
+        if self._vectors is None:
+            self._vectors = np.zeros((self.max_size, vector.shape[0]), dtype=np.float32)
+
+        if not self._free_slots:
+            oldest = next(iter(self._entries))
+            self._evict(oldest)
+
+        slot = self._free_slots.pop()
+        self._vectors[slot] = vector
+        self._entries[slot] = CachedAnswer(
+            question=question,
+            answer=answer,
+            citations=list(citations or []),
+            context_key=context_fingerprint(context),
+            stored_at=time.time()
+        )
+
+    def _evict(self, slot: int):
+        del self._entries[slot]
+        self._free_slots.append(slot)
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        return array / norm if norm else array
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+# Global cache instance
+answer_cache = SemanticAnswerCache(
+    threshold=settings.answer_cache_threshold,
+    max_size=settings.answer_cache_size,
+    ttl_seconds=settings.answer_cache_ttl,
+    enabled=settings.answer_cache_enabled
+)
@@ -0,0 +1,135 @@
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+from app.db.postgres import postgres_client
+from app.config import settings
+
+# Try to import tiktoken for exact token counts, fall back to an estimate
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    print("⚠️ tiktoken not available, conversation budgets will use estimated token counts")
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+# Per-message overhead of the chat format (role markers and separators)
+MESSAGE_TOKEN_OVERHEAD = 4
+
+class TokenCounter:
+    """Counts tokens with the tokenizer of the configured OpenAI model"""
+
+    def __init__(self, model: str):
+        self.model = model
+        self.encoding = None
+        self._resolved = False
+
+    def _resolve(self):
+        # Deferred to first use: tiktoken downloads the BPE file the first time,
+        # which must not block (or break) importing the app without network access
+        self._resolved = True
+        if not TIKTOKEN_AVAILABLE:
+            return
+        try:
+            try:
+                self.encoding = tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"⚠️ Tokenizer for {self.model} unavailable, estimating token counts: {e}")
+
+    def count(self, text: str) -> int:
+        if not self._resolved:
+            self._resolve()
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return max(1, len(text) // 4)
+
+class ConversationMemory:
+    """
+    Rolling per-session window of recent chat turns
+
+    Windows live in an in-process LRU keyed by session and are appended to
+    as turns complete, so follow-up questions get their context without a
+    database query. On a cache miss the window is loaded from Postgres once.
+    `pack` selects the most recent turns that fit a token budget.
+    """
+
+    def __init__(self, max_sessions: int = 1000, window_turns: int = 20, token_budget: int = 1500):
+        self.postgres = postgres_client
+        self.max_sessions = max_sessions
+        self.window_turns = window_turns
+        self.token_budget = token_budget
+        self.tokens = TokenCounter(settings.openai_model)
+        self.hits = 0
+        self.misses = 0
+        self._windows: "OrderedDict[str, Deque[Dict[str, str]]]" = OrderedDict()
+
+    async def get_window(self, session_id: str, before: Optional[datetime] = None) -> List[Dict[str, str]]:
+        """
+        Return recent turns for a session, oldest first
+
+        `before` bounds the database fallback so a message persisted
+        concurrently by the current request is not read back as history.
+        """
+        window = self._windows.get(session_id)
+        if window is not None:
+            self._windows.move_to_end(session_id)
+            self.hits += 1
+            return list(window)
+
+        self.misses += 1
+        rows = await self.postgres.get_recent_chat_history(session_id, self.window_turns, before=before)
+        window = deque(
+            ({"role": row["role"], "content": row["content"]} for row in rows),
+            maxlen=self.window_turns
+        )
+        self._store(session_id, window)
+        return list(window)
+
+    def record(self, session_id: str, role: str, content: str):
+        """Append a completed turn to the session window"""
+        window = self._windows.get(session_id)
+        if window is None:
+            window = deque(maxlen=self.window_turns)
+        window.append({"role": role, "content": content})
+        self._store(session_id, window)
+
+    def pack(self, turns: List[Dict[str, str]], token_budget: Optional[int] = None) -> List[Dict[str, str]]:
+        """Keep the newest turns whose combined token count fits the budget"""
+        budget = self.token_budget if token_budget is None else token_budget
+        packed = []
+        used = 0
+        for turn in reversed(turns):
+            cost = self.tokens.count(turn["content"]) + MESSAGE_TOKEN_OVERHEAD
+            if used + cost > budget:
+                break
+            packed.append(turn)
+            used += cost
+        packed.reverse()
+        return packed
+
+    def _store(self, session_id: str, window: Deque[Dict[str, str]]):
+        self._windows[session_id] = window
+        self._windows.move_to_end(session_id)
+        while len(self._windows) > self.max_sessions:
+            self._windows.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Window cache counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "sessions": len(self._windows),
+            "max_sessions": self.max_sessions,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "exact_token_counts": self.tokens.encoding is not None
+        }
+
+# Global memory instance
+conversation_memory = ConversationMemory(
+    max_sessions=settings.conversation_cache_sessions,
+    window_turns=settings.conversation_window_turns,
+    token_budget=settings.conversation_token_budget
+)
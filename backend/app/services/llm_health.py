@@ -0,0 +1,77 @@
+from typing import Any, Dict, Optional
+from datetime import datetime
+from app.external.openai_client import openai_client
+from app.config import settings
+import asyncio
+
+class LLMHealthMonitor:
+    """
+    Background prober for the LLM provider
+
+    Probes run on a fixed interval outside the request path; their results
+    are cached here so chat requests never pay for a health check. A passing
+    probe lets an open circuit breaker try a real call early, but probe
+    failures never count toward opening it: the probe hits a different
+    endpoint than completions, which may fail for unrelated reasons.
+    """
+
+    def __init__(self):
+        self.openai = openai_client
+        self.interval = settings.llm_health_probe_interval
+        self.last_probe_ok: Optional[bool] = None
+        self.last_probe_at: Optional[datetime] = None
+        self.last_probe_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the background probe loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the background probe loop"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def probe(self) -> bool:
+        """Run a single probe and update cached state"""
+        try:
+            await self.openai.client.models.list()
+            available, error = True, None
+        except Exception as e:
+            available, error = False, str(e)
+        self.last_probe_ok = available
+        self.last_probe_at = datetime.now()
+        self.last_probe_error = error
+
+        if available:
+            # A passing probe only earns a trial call; real completions close the breaker
+            self.openai.breaker.try_half_open()
+
+        return available
+
+    async def _run(self):
+        while True:
+            try:
+                await self.probe()
+            except Exception as e:
+                print(f"LLM health probe error: {e}")
+            await asyncio.sleep(self.interval)
+
+    def status(self) -> Dict[str, Any]:
+        """Cached provider health for reporting"""
+        return {
+            "last_probe_ok": self.last_probe_ok,
+            "last_probe_at": self.last_probe_at,
+            "last_probe_error": self.last_probe_error,
+            "probe_interval_seconds": self.interval,
+            "circuit_breaker": self.openai.breaker.snapshot()
+        }
+
+# Global monitor instance
+llm_health_monitor = LLMHealthMonitor()
@@ -1,40 +1,62 @@
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Union
 from app.external.openai_client import openai_client
+from app.services.conversation_memory import conversation_memory
 from app.config import settings
 
 class LLMService:
     def __init__(self):
         self.openai = openai_client
+        self.memory = conversation_memory
         self.last_model_used = None
         
     async def generate_response(
         self, 
         message: str, 
         context: List[str] = None,
-        session_id: Optional[str] = None
-    ) -> str:
-        """Generate response using OpenAI with Bitcoin-focused prompting"""
+        session_id: Optional[str] = None,
+        stream: bool = False,
+        history: Optional[List[Dict[str, str]]] = None
+    ) -> Union[str, AsyncIterator[str]]:
+        """Generate response using OpenAI with Bitcoin-focused prompting
+
+        Prior turns of the session are included under the conversation token
+        budget. Pass `history` when the caller has already loaded and packed
+        them; otherwise they are looked up by `session_id`. With stream=True,
+        returns an async iterator of response text chunks.
+        """
         
         # Build Bitcoin-focused system prompt
         system_prompt = self._build_bitcoin_system_prompt(context)
         
         try:
-            # Try OpenAI first
-            if await self.openai.is_available():
+            # Try OpenAI first, unless the circuit breaker says it is down
+            if self.openai.breaker.allow_request():
+                if history is None and session_id:
+                    history = self.memory.pack(await self.memory.get_window(session_id))
+                
+                # Context is already part of the system prompt
                 response = await self.openai.generate_response(
                     system_prompt=system_prompt,
                     user_message=message,
-                    context=context
+                    stream=stream,
+                    history=history
                 )
                 self.last_model_used = "openai"
                 return response
             else:
-                raise Exception("OpenAI not available")
+                raise Exception("OpenAI circuit breaker open")
                 
         except Exception as e:
             print(f"LLM generation error: {e}")
             self.last_model_used = "fallback"
-            return self._get_fallback_response(message)
+            fallback = self._get_fallback_response(message)
+            if stream:
+                return self._iter_text(fallback)
+            return fallback
+    
+    async def _iter_text(self, text: str) -> AsyncIterator[str]:
+        """Wrap a complete response as a single-chunk stream"""
+        yield text
     
     def _build_bitcoin_system_prompt(self, context: List[str] = None) -> str:
         """Build Bitcoin-specific system prompt with RAG context"""
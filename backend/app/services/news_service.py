@@ -1,13 +1,17 @@
 from typing import List, Dict, Any
 from app.external.cryptopanic import cryptopanic_client
 from app.models.news import NewsArticle, NewsResponse
+from app.core.single_flight import SingleFlight
+from app.config import settings
 from datetime import datetime, timedelta
+import asyncio
 
 class NewsService:
     def __init__(self):
         self.cryptopanic = cryptopanic_client
         self._cache = {}
         self._cache_timeout = 300  # 5 minute cache
+        self._flights = SingleFlight(timeout=settings.upstream_wait_timeout)
         
     async def get_latest_news(self, limit: int = 10) -> NewsResponse:
         """Get latest Bitcoin news with caching"""
@@ -21,36 +25,44 @@ class NewsService:
                 return cached_data
         
         try:
-            # Get fresh news from CryptoPanic
-            news_data = await self.cryptopanic.get_bitcoin_news(limit=limit)
-            
-            articles = []
-            for item in news_data:
-                article = NewsArticle(
-                    title=item.get("title", ""),
-                    url=item.get("url", ""),
-                    source=item.get("source", "Unknown"),
-                    published_at=item.get("published_at"),
-                    summary=item.get("summary", ""),
-                    sentiment=item.get("sentiment", "neutral"),
-                    currencies=item.get("currencies", ["BTC"])
-                )
-                articles.append(article)
-            
-            result = NewsResponse(
-                articles=articles,
-                total_count=len(articles),
-                last_updated=now
-            )
-            
-            # Cache the result
-            self._cache[cache_key] = (result, now)
-            return result
+            # Concurrent misses for the same key share one CryptoPanic call
+            return await self._flights.do(cache_key, lambda: self._fetch_latest_news(cache_key, limit))
             
+        except asyncio.TimeoutError:
+            print("News service error: timed out waiting for CryptoPanic")
+            return self._get_fallback_news()
         except Exception as e:
             print(f"News service error: {e}")
             return self._get_fallback_news()
     
+    async def _fetch_latest_news(self, cache_key: str, limit: int) -> NewsResponse:
+        """Fetch latest news from CryptoPanic and cache it"""
+        news_data = await self.cryptopanic.get_bitcoin_news(limit=limit)
+        now = datetime.now()
+        
+        articles = []
+        for item in news_data:
+            article = NewsArticle(
+                title=item.get("title", ""),
+                url=item.get("url", ""),
+                source=item.get("source", "Unknown"),
+                published_at=item.get("published_at"),
+                summary=item.get("summary", ""),
+                sentiment=item.get("sentiment", "neutral"),
+                currencies=item.get("currencies", ["BTC"])
+            )
+            articles.append(article)
+        
+        result = NewsResponse(
+            articles=articles,
+            total_count=len(articles),
+            last_updated=now
+        )
+        
+        # Cache the result
+        self._cache[cache_key] = (result, now)
+        return result
+    
     async def get_news_summary(self) -> Dict[str, Any]:
         """Get a summary of recent Bitcoin news"""
         try:
@@ -0,0 +1,132 @@
+from typing import Any, AsyncIterator, Dict, Optional
+from app.models.prices import PriceData
+from app.services.price_poller import price_poller
+from app.config import settings
+import asyncio
+import json
+import weakref
+
+def _sse_frame(event: str, data: Dict[str, Any]) -> str:
+    """Format a server-sent event frame"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def _diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields of `new` that are missing from or different in `old`"""
+    return {key: value for key, value in new.items() if key not in old or old[key] != value}
+
+HEARTBEAT_FRAME = ": keepalive\n\n"
+
+class PriceBroadcaster:
+    """
+    Fans price updates from the background poller out to every open stream
+
+    Subscribers hold no queue. Each one remembers the state it last sent and,
+    when woken, sends the fields that differ from the latest state. A slow
+    consumer therefore skips straight to the newest values (intermediate
+    updates coalesce) and memory per connection stays constant. The common
+    case, a subscriber exactly one update behind, reuses a frame encoded
+    once per update.
+    """
+
+    def __init__(self):
+        self.max_subscribers = settings.price_stream_max_subscribers
+        self.heartbeat = settings.price_stream_heartbeat
+        self.state: Dict[str, Any] = {}
+        self.subscribers = 0
+        self.updates = 0
+        self._previous_state: Optional[Dict[str, Any]] = None
+        self._delta_frame: Optional[str] = None
+        self._changed: Optional[asyncio.Event] = None
+        price_poller.add_listener(self.publish)
+
+    def publish(self, price: PriceData):
+        """Replace the shared state and wake every subscriber if anything changed"""
+        state = price.model_dump(mode="json")
+        delta = _diff(self.state, state)
+        if not delta:
+            return
+
+        # State dicts are never mutated after publication, so subscribers may hold references
+        self._previous_state, self.state = self.state, state
+        self._delta_frame = _sse_frame("price", delta)
+        self.updates += 1
+
+        if self._changed is not None:
+            changed, self._changed = self._changed, None
+            changed.set()
+
+    def subscribe(self) -> Optional[AsyncIterator[str]]:
+        """
+        Reserve a subscriber slot and return its frame stream, or None if all slots are taken
+
+        The check and the reservation run without an await in between, so
+        concurrent connects cannot overshoot `max_subscribers`.
+        """
+        if self.subscribers >= self.max_subscribers:
+            return None
+        self.subscribers += 1
+        stream = self._stream()
+        # Free the slot once the stream is dropped, including one the response
+        # never started iterating (client gone before the body was sent)
+        weakref.finalize(stream, self._release)
+        return stream
+
+    def _release(self):
+        self.subscribers -= 1
+
+    async def _stream(self) -> AsyncIterator[str]:
+        """
+        Yield SSE frames for one subscriber until it disconnects
+
+        The first frame is a `snapshot` event with every field; later `price`
+        events carry only the fields that changed. A keepalive comment is sent
+        after `heartbeat` idle seconds.
+        """
+        if not self.state:
+            self._sync_with_poller()
+
+        sent: Dict[str, Any] = {}
+        while True:
+            state = self.state
+            if state is not sent:
+                if not sent:
+                    frame = _sse_frame("snapshot", state) if state else None
+                elif sent is self._previous_state:
+                    frame = self._delta_frame
+                else:
+                    frame = _sse_frame("price", _diff(sent, state))
+                sent = state
+                if frame:
+                    yield frame
+                continue
+
+            try:
+                await asyncio.wait_for(self._wait_for_change(), self.heartbeat)
+            except asyncio.TimeoutError:
+                self._sync_with_poller()
+                if self.state is sent:
+                    yield HEARTBEAT_FRAME
+
+    def _sync_with_poller(self):
+        # The poller marks a price stale by age only when it is read, which
+        # publishes nothing; checking on idle heartbeats pushes the flag
+        # within `heartbeat` seconds (publish is a no-op if nothing changed)
+        current = price_poller.current_price()
+        if current is not None:
+            self.publish(current)
+
+    def _wait_for_change(self):
+        # One event shared by all idle subscribers, replaced after each update
+        if self._changed is None:
+            self._changed = asyncio.Event()
+        return self._changed.wait()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": self.subscribers,
+            "max_subscribers": self.max_subscribers,
+            "updates": self.updates
+        }
+
+# Global broadcaster instance
+price_broadcaster = PriceBroadcaster()
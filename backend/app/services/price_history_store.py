@@ -0,0 +1,121 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+from app.db.postgres import postgres_client
+from app.external.coingecko import coingecko_client
+from app.models.prices import PriceHistory
+from app.config import settings
+import math
+import time
+
+HOUR_MS = 3600 * 1000
+DAY_MS = 24 * HOUR_MS
+
+# Series kept in the price_history table: bucket width, depth of the first fetch and retention (days)
+RESOLUTIONS = {
+    "daily": (DAY_MS, settings.price_history_backfill_days, settings.price_history_daily_retention_days),
+    "hourly": (HOUR_MS, 1, settings.price_history_hourly_retention_days)
+}
+
+def resolution_for(days: int) -> str:
+    """Series that serves a `days` window (matches CoinGecko's market_chart intervals)"""
+    return "hourly" if days <= 1 else "daily"
+
+class PriceHistoryStore:
+    """
+    Local price history in PostgreSQL, topped up incrementally from CoinGecko
+
+    Each series is backfilled once, after which a sync fetches only the days
+    since the newest stored bucket. Points are keyed by the start of their
+    day/hour bucket; the current bucket is overwritten by later points until
+    the next one begins. Points older than the series' retention are pruned
+    after each sync, so the table stays bounded. Windows are served by range
+    queries, so history stays available while CoinGecko is down.
+    """
+
+    def __init__(self, symbol: str = "BTC"):
+        self.symbol = symbol
+        self.db = postgres_client
+        self.coingecko = coingecko_client
+        self.last_sync_ok: Optional[bool] = None
+        self.last_synced_at: Optional[datetime] = None
+        self.points_written = 0
+
+    async def sync(self) -> bool:
+        """Fetch and store new points for every series; False if the database, a fetch or a write failed"""
+        ok = True
+        for resolution in RESOLUTIONS:
+            ok = await self._sync_series(resolution) and ok
+        self.last_sync_ok = ok
+        if ok:
+            self.last_synced_at = datetime.now()
+        return ok
+
+    async def _sync_series(self, resolution: str) -> bool:
+        bucket_ms, backfill_days, retention_days = RESOLUTIONS[resolution]
+        try:
+            latest_bucket = await self.db.get_latest_price_bucket(self.symbol, resolution)
+        except Exception as e:
+            # Without the newest bucket we cannot tell what to fetch; try again next cycle
+            print(f"⚠️ Price history sync skipped ({resolution}), database unavailable: {e}")
+            return False
+        now_ms = int(time.time() * 1000)
+
+        if latest_bucket is None:
+            days = backfill_days
+        else:
+            # Only the span since the newest bucket (which is refetched, as it may still be open)
+            days = max(1, math.ceil((now_ms - latest_bucket) / DAY_MS))
+
+        data = await self.coingecko.get_bitcoin_history(days=days, interval=resolution)
+        if not data:
+            return False
+
+        market_caps = {int(ts): value for ts, value in data.get("market_caps", [])}
+        total_volumes = {int(ts): value for ts, value in data.get("total_volumes", [])}
+        points = {}
+        for ts, price in data.get("prices", []):
+            ts = int(ts)
+            bucket = ts - ts % bucket_ms
+            if latest_bucket is not None and bucket < latest_bucket:
+                continue
+            # Later points in a bucket replace earlier ones
+            points[bucket] = (
+                self.symbol, resolution, bucket, ts, price,
+                market_caps.get(ts), total_volumes.get(ts)
+            )
+
+        if not await self.db.save_price_points(list(points.values())):
+            return False
+        self.points_written += len(points)
+
+        # A failed prune leaves the new points valid, so it does not fail the sync
+        cutoff_ms = now_ms - retention_days * DAY_MS
+        await self.db.delete_price_points_before(self.symbol, resolution, cutoff_ms - cutoff_ms % bucket_ms)
+        return True
+
+    async def get_history(self, days: int) -> Optional[PriceHistory]:
+        """History for the last `days` days from the local table, or None if it has no data"""
+        resolution = resolution_for(days)
+        bucket_ms = RESOLUTIONS[resolution][0]
+        since_ms = int(time.time() * 1000) - days * DAY_MS
+        rows = await self.db.get_price_points(self.symbol, resolution, since_ms - since_ms % bucket_ms)
+        if not rows:
+            return None
+
+        return PriceHistory(
+            symbol=self.symbol,
+            prices=[[row["timestamp_ms"], row["price"]] for row in rows],
+            market_caps=[[row["timestamp_ms"], row["market_cap"]] for row in rows if row["market_cap"] is not None],
+            total_volumes=[[row["timestamp_ms"], row["total_volume"]] for row in rows if row["total_volume"] is not None],
+            stale=self.last_sync_ok is False
+        )
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "last_sync_ok": self.last_sync_ok,
+            "last_synced_at": self.last_synced_at,
+            "points_written": self.points_written
+        }
+
+# Global store instance
+price_history_store = PriceHistoryStore()
@@ -0,0 +1,184 @@
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional
+from app.external.coingecko import coingecko_client
+from app.services.price_history_store import price_history_store
+from app.models.prices import PriceData, PriceHistory
+from app.config import settings
+import asyncio
+import time
+
+@dataclass(frozen=True)
+class PriceSnapshot:
+    """
+    Immutable view of the latest polled market data
+
+    The poller never mutates a snapshot; each refresh publishes a new one
+    by swapping a single reference, so readers need no locks.
+    """
+    price: Optional[PriceData] = None
+    price_fetched_at: Optional[float] = None  # time.monotonic() of the last good fetch
+    histories: Mapping[int, PriceHistory] = field(default_factory=lambda: MappingProxyType({}))
+    last_error: Optional[str] = None
+    last_error_at: Optional[datetime] = None
+
+class PricePoller:
+    """
+    Background refresher for current price and common history windows
+
+    CoinGecko is polled on a schedule outside the request path and handlers
+    read the published snapshot in O(1). When a refresh fails the last good
+    value keeps being served, marked `stale`.
+    """
+
+    def __init__(self):
+        self.coingecko = coingecko_client
+        self.history_store = price_history_store
+        self.interval = settings.price_poll_interval
+        self.history_interval = settings.price_history_poll_interval
+        self.history_windows = list(settings.price_history_windows)
+        self.stale_after = settings.price_stale_after
+        self.snapshot = PriceSnapshot()
+        self.refreshes = 0
+        self.failures = 0
+        self._listeners: List[Callable[[PriceData], None]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the background polling loop"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Cancel the background polling loop"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def add_listener(self, listener: Callable[[PriceData], None]):
+        """Call `listener` with every newly published price (including stale markings)"""
+        self._listeners.append(listener)
+
+    def current_price(self) -> Optional[PriceData]:
+        """Latest polled price, marked stale if it has not been refreshed recently"""
+        snapshot = self.snapshot
+        price = snapshot.price
+        if price is not None and not price.stale and time.monotonic() - snapshot.price_fetched_at > self.stale_after:
+            return price.model_copy(update={"stale": True})
+        return price
+
+    def history(self, days: int) -> Optional[PriceHistory]:
+        """Latest polled history for a window, if it is one of the polled windows"""
+        return self.snapshot.histories.get(days)
+
+    async def refresh_price(self) -> bool:
+        """Fetch the current price and publish it, or mark the last good value stale"""
+        data = await self.coingecko.get_bitcoin_price(fallback=False)
+        if data and data.get("current_price") is not None:
+            price = PriceData(
+                symbol=data.get("symbol", "BTC"),
+                current_price=data["current_price"],
+                market_cap=data.get("market_cap"),
+                total_volume=data.get("total_volume"),
+                price_change_percentage_24h=data.get("price_change_percentage_24h"),
+                last_updated=datetime.now()
+            )
+            self._publish(price=price, price_fetched_at=time.monotonic())
+            self.refreshes += 1
+            return True
+
+        self._record_failure("price refresh failed")
+        price = self.snapshot.price
+        if price is not None and not price.stale:
+            self._publish(price=price.model_copy(update={"stale": True}))
+        return False
+
+    async def refresh_history(self, days: int) -> bool:
+        """Publish one history window from the local store (or CoinGecko), or mark the last good copy stale"""
+        history = await self.history_store.get_history(days)
+        if history is None:
+            # Store empty or unreachable: fetch the whole window as before
+            data = await self.coingecko.get_bitcoin_history(days=days)
+            if data:
+                history = PriceHistory(
+                    symbol="BTC",
+                    prices=data.get("prices", []),
+                    market_caps=data.get("market_caps", []),
+                    total_volumes=data.get("total_volumes", [])
+                )
+
+        histories = dict(self.snapshot.histories)
+        if history is not None:
+            histories[days] = history
+            self._publish(histories=MappingProxyType(histories))
+            self.refreshes += 1
+            return True
+
+        self._record_failure(f"{days}d history refresh failed")
+        if days in histories and not histories[days].stale:
+            histories[days] = histories[days].model_copy(update={"stale": True})
+            self._publish(histories=MappingProxyType(histories))
+        return False
+
+    def _publish(self, **changes):
+        self.snapshot = replace(self.snapshot, **changes)
+        if changes.get("price") is not None:
+            for listener in self._listeners:
+                listener(changes["price"])
+
+    def _record_failure(self, message: str):
+        self.failures += 1
+        self._publish(last_error=message, last_error_at=datetime.now())
+
+    async def _run(self):
+        next_history_at = 0.0
+        while True:
+            try:
+                await self.refresh_price()
+            except Exception as e:
+                print(f"Price poll error: {e}")
+                self._record_failure(str(e))
+
+            if time.monotonic() >= next_history_at:
+                try:
+                    if not await self.history_store.sync():
+                        self._record_failure("price history sync failed")
+                except Exception as e:
+                    print(f"Price history sync error: {e}")
+                    self._record_failure(str(e))
+
+                # Windows are range queries on the store; the fallback fetches go one at a time
+                for days in self.history_windows:
+                    try:
+                        await self.refresh_history(days)
+                    except Exception as e:
+                        print(f"Price history poll error ({days}d): {e}")
+                        self._record_failure(str(e))
+                next_history_at = time.monotonic() + self.history_interval
+
+            await asyncio.sleep(self.interval)
+
+    def status(self) -> Dict[str, Any]:
+        """Polling state for reporting"""
+        snapshot = self.snapshot
+        price = self.current_price()
+        return {
+            "last_price": price.current_price if price else None,
+            "last_updated": price.last_updated if price else None,
+            "stale": price.stale if price else None,
+            "history_windows": sorted(snapshot.histories),
+            "history_store": self.history_store.status(),
+            "poll_interval_seconds": self.interval,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "last_error": snapshot.last_error,
+            "last_error_at": snapshot.last_error_at
+        }
+
+# Global poller instance
+price_poller = PricePoller()
@@ -1,16 +1,30 @@
 from typing import Optional, Dict, Any
 from app.external.coingecko import coingecko_client
 from app.models.prices import PriceData, PriceHistory
+from app.services.price_poller import price_poller
+from app.services.price_history_store import price_history_store
+from app.core.single_flight import SingleFlight
+from app.core.price_series import PriceSeries
+from app.config import settings
 from datetime import datetime
+import asyncio
 
 class PriceService:
     def __init__(self):
         self.coingecko = coingecko_client
+        self.poller = price_poller
+        self.history_store = price_history_store
         self._cache = {}
         self._cache_timeout = 60  # 1 minute cache
+        self._flights = SingleFlight(timeout=settings.upstream_wait_timeout)
+        self._series = {}  # days -> (history it was built from, PriceSeries)
         
     async def get_current_price(self) -> PriceData:
-        """Get current Bitcoin price with caching"""
+        """Get current Bitcoin price, from the background poller when it has one"""
+        polled = self.poller.current_price()
+        if polled is not None:
+            return polled
+        
         cache_key = "current_price"
         now = datetime.now()
         
@@ -21,23 +35,13 @@ class PriceService:
                 return cached_data
         
         try:
-            # Get fresh data from CoinGecko
-            price_data = await self.coingecko.get_bitcoin_price()
-            
-            if price_data:
-                result = PriceData(
-                    symbol=price_data.get("symbol", "BTC"),
-                    current_price=price_data.get("current_price", 0),
-                    market_cap=price_data.get("market_cap"),
-                    total_volume=price_data.get("total_volume"),
-                    price_change_percentage_24h=price_data.get("price_change_percentage_24h"),
-                    last_updated=datetime.now()
-                )
-                
-                # Cache the result
-                self._cache[cache_key] = (result, now)
+            # Concurrent misses share one CoinGecko call instead of each making their own
+            result = await self._flights.do(cache_key, self._fetch_current_price)
+            if result:
                 return result
                 
+        except asyncio.TimeoutError:
+            print("Price service error: timed out waiting for CoinGecko")
         except Exception as e:
             print(f"Price service error: {e}")
         
@@ -54,7 +58,11 @@ class PriceService:
         return fallback_price
     
     async def get_price_history(self, days: int = 7) -> Optional[PriceHistory]:
-        """Get Bitcoin price history"""
+        """Get Bitcoin price history, from the background poller for polled windows, else the local store"""
+        polled = self.poller.history(days)
+        if polled is not None:
+            return polled
+        
         cache_key = f"history_{days}d"
         now = datetime.now()
         
@@ -65,25 +73,63 @@ class PriceService:
                 return cached_data
         
         try:
-            history_data = await self.coingecko.get_bitcoin_history(days=days)
-            
-            if history_data:
-                result = PriceHistory(
-                    symbol="BTC",
-                    prices=history_data.get("prices", []),
-                    market_caps=history_data.get("market_caps", []),
-                    total_volumes=history_data.get("total_volumes", [])
-                )
-                
-                # Cache the result
-                self._cache[cache_key] = (result, now)
-                return result
+            return await self._flights.do(cache_key, lambda: self._fetch_price_history(days))
                 
+        except asyncio.TimeoutError:
+            print(f"Price history error: timed out waiting for CoinGecko ({days}d)")
         except Exception as e:
             print(f"Price history error: {e}")
             
         return None
     
+    async def get_price_series(self, days: int = 7) -> Optional[PriceSeries]:
+        """Get Bitcoin price history as a columnar series, built once per cached history"""
+        history = await self.get_price_history(days=days)
+        if history is None:
+            return None
+        
+        cached = self._series.get(days)
+        if cached is not None and cached[0] is history:
+            return cached[1]
+        
+        series = PriceSeries.from_pairs(history.prices, stale=history.stale)
+        self._series[days] = (history, series)
+        return series
+    
+    async def _fetch_current_price(self) -> Optional[PriceData]:
+        """Fetch the current price from CoinGecko and cache it"""
+        price_data = await self.coingecko.get_bitcoin_price()
+        if not price_data:
+            return None
+        
+        result = PriceData(
+            symbol=price_data.get("symbol", "BTC"),
+            current_price=price_data.get("current_price", 0),
+            market_cap=price_data.get("market_cap"),
+            total_volume=price_data.get("total_volume"),
+            price_change_percentage_24h=price_data.get("price_change_percentage_24h"),
+            last_updated=datetime.now()
+        )
+        self._cache["current_price"] = (result, datetime.now())
+        return result
+    
+    async def _fetch_price_history(self, days: int) -> Optional[PriceHistory]:
+        """Read one history window from the local store (CoinGecko if it is empty) and cache it"""
+        result = await self.history_store.get_history(days)
+        if result is None:
+            history_data = await self.coingecko.get_bitcoin_history(days=days)
+            if not history_data:
+                return None
+            
+            result = PriceHistory(
+                symbol="BTC",
+                prices=history_data.get("prices", []),
+                market_caps=history_data.get("market_caps", []),
+                total_volumes=history_data.get("total_volumes", [])
+            )
+        self._cache[f"history_{days}d"] = (result, datetime.now())
+        return result
+    
     async def get_price_summary(self) -> Dict[str, Any]:
         """Get a summary of current Bitcoin price status"""
         price_data = await self.get_current_price()
@@ -1,94 +1,183 @@
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
 from app.db.qdrant_client import vector_db
+from app.db.lexical_index import LexicalIndex
+from app.services.reranker import reranker
+from app.core.document_ids import document_id
+from app.core.keyword_automaton import KeywordAutomaton
 from app.config import settings
+import asyncio
+import json
+
+# Glossary locations: backend/ as the app root (container) or the repository root (local checkout)
+GLOSSARY_CANDIDATES = [
+    Path(__file__).resolve().parents[level] / "data" / "bitcoin_corpus" / "glossary" / "bitcoin_glossary.json"
+    for level in (2, 3)
+]
+
+# Returned when no glossary term appears in the query
+DEFAULT_KNOWLEDGE = {
+    "content": "Bitcoin is a decentralized digital currency created by Satoshi Nakamoto in 2008. It operates on a peer-to-peer network without central authority, enabling direct transactions between parties without financial institutions.",
+    "citation": "Bitcoin Whitepaper - Abstract",
+    "source": "Bitcoin Whitepaper",
+    "score": 0.9
+}
+
+def load_glossary_terms() -> List[Dict[str, Any]]:
+    """Read glossary terms from GLOSSARY_PATH or the bundled corpus"""
+    candidates = [Path(settings.glossary_path)] if settings.glossary_path else GLOSSARY_CANDIDATES
+    for path in candidates:
+        if path.exists():
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f).get("terms", [])
+    print("⚠️ Glossary not found, keyword fallback will only return general Bitcoin info")
+    return []
+
+def build_glossary_automaton(terms: List[Dict[str, Any]]) -> KeywordAutomaton[Tuple[Dict[str, Any], int]]:
+    """
+    Index glossary term names and synonyms (plus simple plurals) for keyword fallback
+    
+    Each phrase maps to the term's knowledge entry and the phrase's word
+    count, which ranks more specific matches higher.
+    """
+    automaton: KeywordAutomaton[Tuple[Dict[str, Any], int]] = KeywordAutomaton()
+    for term in terms:
+        source = term.get("source") or "Bitcoin Glossary"
+        entry = {
+            "content": term["definition"],
+            "citation": f"{source} - {term['term']}",
+            "source": source
+        }
+        for phrase in [term["term"], *term.get("synonyms", [])]:
+            words = len(phrase.split())
+            automaton.add(phrase, (entry, words))
+            if not phrase.lower().endswith("s"):
+                automaton.add(phrase + "s", (entry, words))
+    automaton.build()
+    return automaton
+
+def reciprocal_rank_fusion(result_lists: List[List[Dict[str, Any]]], limit: int, k: int = 60) -> List[Dict[str, Any]]:
+    """
+    Merge ranked result lists by summing 1 / (k + rank) per document
+    
+    Only ranks are used, so BM25 and cosine scores never need to be put on
+    the same scale. The fused value replaces each result's `score`.
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    for results in result_lists:
+        for rank, result in enumerate(results, start=1):
+            key = result.get("id") or result["content"]
+            entry = fused.setdefault(key, {**result, "score": 0.0})
+            entry["score"] += 1.0 / (k + rank)
+    
+    return sorted(fused.values(), key=lambda result: result["score"], reverse=True)[:limit]
 
 class RAGService:
     def __init__(self):
         self.vector_db = vector_db
+        self.lexical_index: Optional[LexicalIndex] = None
+        self.reranker = reranker
+        self._keywords: Optional[KeywordAutomaton] = None
+    
+    async def initialize(self):
+        """Load the BM25 index built at ingest time, the reranker and the keyword fallback"""
+        await self.reranker.initialize()
+        self._keyword_automaton()
+        
+        path = settings.lexical_index_path
+        if not LexicalIndex.exists(path):
+            if settings.retrieval_mode == "hybrid" and path:
+                print(f"⚠️ Lexical index not found at {path}, using vector search only")
+            return
+        
+        try:
+            self.lexical_index = LexicalIndex.open(path)
+            print(f"✅ Lexical index loaded ({len(self.lexical_index)} documents)")
+        except Exception as e:
+            print(f"⚠️ Failed to load lexical index: {e}")
+    
+    async def close(self):
+        await self.reranker.close()
+        if self.lexical_index:
+            self.lexical_index.close()
+            self.lexical_index = None
         
     async def search_knowledge(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """Search Bitcoin knowledge base using RAG"""
         try:
-            # Search vector database for similar content
-            results = await self.vector_db.search_similar(query, limit=limit)
+            # Over-fetch when a reranker will pick the final results
+            candidates = max(limit, settings.rerank_candidates) if self.reranker.enabled else limit
+            
+            if settings.retrieval_mode == "hybrid" and self.lexical_index:
+                results = await self._search_hybrid(query, candidates)
+            else:
+                # Search vector database for similar content
+                results = await self.vector_db.search_similar(query, limit=candidates)
             
             if not results:
                 # Fallback to static Bitcoin knowledge if vector DB not ready
-                return self._get_fallback_knowledge(query)
+                return self._get_fallback_knowledge(query, limit)
                 
-            return results
+            return await self.reranker.rerank(query, results, limit)
             
         except Exception as e:
             print(f"RAG search error: {e}")
-            return self._get_fallback_knowledge(query)
+            return self._get_fallback_knowledge(query, limit)
     
-    def _get_fallback_knowledge(self, query: str) -> List[Dict[str, Any]]:
-        """Provide fallback Bitcoin knowledge when vector DB is unavailable"""
-        query_lower = query.lower()
+    async def _search_hybrid(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Run dense and BM25 retrieval concurrently and fuse their rankings"""
+        candidates = max(limit, settings.hybrid_candidates)
+        loop = asyncio.get_running_loop()
         
-        # Static Bitcoin knowledge base for key topics
-        knowledge_base = {
-            "bitcoin": {
-                "content": "Bitcoin is a decentralized digital currency created by Satoshi Nakamoto in 2008. It operates on a peer-to-peer network without central authority, enabling direct transactions between parties without financial institutions.",
-                "citation": "Bitcoin Whitepaper - Abstract",
-                "source": "Bitcoin Whitepaper",
-                "score": 0.9
-            },
-            "proof of work": {
-                "content": "Proof of Work is a consensus mechanism where network participants (miners) compete to solve computationally difficult puzzles to validate transactions and create new blocks. This system provides security and prevents double-spending.",
-                "citation": "Bitcoin Whitepaper - Section 4: Proof-of-Work", 
-                "source": "Bitcoin Whitepaper",
-                "score": 0.9
-            },
-            "mining": {
-                "content": "Bitcoin mining is the process of validating transactions and adding them to the blockchain by solving cryptographic puzzles. Miners are rewarded with newly created bitcoins and transaction fees for their computational work.",
-                "citation": "Bitcoin Protocol Documentation",
-                "source": "Bitcoin Network",
-                "score": 0.85
-            },
-            "blockchain": {
-                "content": "A blockchain is a distributed ledger that maintains a continuously growing list of records, called blocks, linked and secured using cryptography. Each block contains a cryptographic hash of the previous block.",
-                "citation": "Bitcoin Whitepaper - Section 3: Timestamp Server",
-                "source": "Bitcoin Whitepaper", 
-                "score": 0.85
-            },
-            "satoshi nakamoto": {
-                "content": "Satoshi Nakamoto is the pseudonymous creator of Bitcoin who published the Bitcoin whitepaper in 2008 and released the first Bitcoin software in 2009. Their true identity remains unknown.",
-                "citation": "Bitcoin History Documentation",
-                "source": "Bitcoin History",
-                "score": 0.9
-            },
-            "private key": {
-                "content": "A private key is a secret cryptographic key that allows the owner to spend bitcoin associated with a specific Bitcoin address. It must be kept secure as anyone with access to the private key can spend the associated bitcoins.",
-                "citation": "Bitcoin Cryptography Documentation",
-                "source": "Bitcoin Security Guide",
-                "score": 0.85
-            },
-            "halving": {
-                "content": "Bitcoin halving is an event that occurs approximately every 4 years where the block reward given to miners is reduced by half. This mechanism controls Bitcoin's inflation rate and ensures the 21 million coin supply limit.",
-                "citation": "Bitcoin Monetary Policy",
-                "source": "Bitcoin Protocol",
-                "score": 0.85
-            }
-        }
+        dense_results, lexical_results = await asyncio.gather(
+            self.vector_db.search_similar(query, limit=candidates),
+            loop.run_in_executor(None, self.lexical_index.search, query, candidates),
+            return_exceptions=True
+        )
+        
+        result_lists = []
+        for name, results in (("Vector", dense_results), ("Lexical", lexical_results)):
+            if isinstance(results, Exception):
+                print(f"{name} search error: {results}")
+            elif results:
+                result_lists.append(results)
+        
+        return reciprocal_rank_fusion(result_lists, limit, k=settings.rrf_k)
+    
+    def _keyword_automaton(self) -> KeywordAutomaton:
+        """Build the glossary automaton on first use; it is reused for every later fallback"""
+        if self._keywords is None:
+            self._keywords = build_glossary_automaton(load_glossary_terms())
+        return self._keywords
+    
+    def _get_fallback_knowledge(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Provide fallback Bitcoin knowledge when vector DB is unavailable"""
+        matches = self._keyword_automaton().find(query)
         
-        # Find relevant knowledge
+        # Most specific (longest) phrases first; matches inside an accepted span are dropped,
+        # so "satoshi nakamoto" wins over "satoshi"
+        matches.sort(key=lambda match: (match[0] - match[1], match[0]))
+        spans = []
         results = []
-        for key, data in knowledge_base.items():
-            if any(keyword in query_lower for keyword in key.split()):
-                results.append(data)
+        for start, end, (entry, words) in matches:
+            if any(s <= start and end <= e for s, e in spans):
+                continue
+            spans.append((start, end))
+            if any(result["citation"] == entry["citation"] and result["content"] == entry["content"] for result in results):
+                continue
+            results.append({**entry, "score": round(0.8 + 0.05 * min(words, 3), 2)})
         
         # If no specific matches, provide general Bitcoin info
         if not results:
-            results.append(knowledge_base["bitcoin"])
+            results.append(dict(DEFAULT_KNOWLEDGE))
             
         return results[:limit]
     
     async def add_knowledge(self, content: str, citation: str, source: str) -> bool:
         """Add new knowledge to the vector database"""
         try:
-            # Generate a simple ID (in production, use proper ID generation)
-            doc_id = hash(content) % 100000
+            # Content-addressed ID: stable across runs, re-adding is idempotent
+            doc_id = document_id(source, content)
             
             success = await self.vector_db.add_document(
                 content=content,
@@ -0,0 +1,138 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.document_ids import content_hash
+from app.core.embedding_cache import normalize_query
+from app.config import settings
+import asyncio
+import time
+
+# Try to import the cross-encoder, fall back to first-stage ranking if not available
+try:
+    from sentence_transformers import CrossEncoder
+    CROSS_ENCODER_AVAILABLE = True
+except ImportError:
+    CrossEncoder = None
+    CROSS_ENCODER_AVAILABLE = False
+
+# Weight of the newest measurement in the per-pair latency estimate
+LATENCY_SMOOTHING = 0.2
+
+# Shrinks the latency estimate on every budget skip so reranking is retried after a load spike
+SKIP_DECAY = 0.9
+
+class CrossEncoderReranker:
+    """
+    Second-stage reranking of retrieval candidates with a CPU cross-encoder
+
+    All (query, passage) pairs are scored in one batched forward pass on a
+    dedicated thread. A running per-pair latency estimate skips reranking
+    when it would not fit `budget_ms`, and a run that overshoots is
+    abandoned in favour of the first-stage order. Scores are cached by
+    query and candidate IDs, so repeated questions skip the model.
+    """
+
+    def __init__(self, model_name: str, enabled: bool = False, budget_ms: float = 150.0, cache_size: int = 1000):
+        self.model_name = model_name
+        self.enabled = enabled and CROSS_ENCODER_AVAILABLE
+        self.budget_ms = budget_ms
+        self.cache_size = cache_size
+        self.model = None
+        self.per_pair_ms: Optional[float] = None
+        self.stats_counts = {"reranked": 0, "cache_hits": 0, "skipped_budget": 0, "timeouts": 0, "errors": 0}
+        self._cache: "OrderedDict[Tuple[str, Tuple[str, ...]], List[float]]" = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reranker")
+
+        if enabled and not CROSS_ENCODER_AVAILABLE:
+            print("⚠️ sentence-transformers not available, reranking will be disabled")
+
+    async def initialize(self):
+        """Load the cross-encoder off the event loop"""
+        if not self.enabled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+            self.model = await loop.run_in_executor(self._executor, CrossEncoder, self.model_name)
+            print(f"✅ Reranker loaded ({self.model_name})")
+        except Exception as e:
+            print(f"⚠️ Reranker initialization failed: {e}")
+            self.enabled = False
+
+    async def rerank(self, query: str, candidates: List[Dict[str, Any]], limit: int) -> List[Dict[str, Any]]:
+        """Return the best `limit` candidates, reranked when the model and budget allow"""
+        if not self.enabled or self.model is None or len(candidates) <= 1:
+            return candidates[:limit]
+
+        key = (normalize_query(query), tuple(c.get("id") or content_hash(c["content"]) for c in candidates))
+        scores = self._cache.get(key)
+        if scores is not None:
+            self._cache.move_to_end(key)
+            self.stats_counts["cache_hits"] += 1
+            return self._apply(candidates, scores, limit)
+
+        if self.per_pair_ms is not None and self.per_pair_ms * len(candidates) > self.budget_ms:
+            self.per_pair_ms *= SKIP_DECAY
+            self.stats_counts["skipped_budget"] += 1
+            return candidates[:limit]
+
+        loop = asyncio.get_running_loop()
+        pairs = [(query, c["content"]) for c in candidates]
+        future = loop.run_in_executor(self._executor, self._score, pairs)
+        try:
+            scores = await asyncio.wait_for(asyncio.shield(future), self.budget_ms / 1000)
+        except asyncio.TimeoutError:
+            # Keep the late result for the next identical request
+            self.stats_counts["timeouts"] += 1
+            future.add_done_callback(lambda f: self._store(key, f.result()) if not f.cancelled() and f.exception() is None else None)
+            return candidates[:limit]
+        except Exception as e:
+            print(f"Rerank error: {e}")
+            self.stats_counts["errors"] += 1
+            return candidates[:limit]
+
+        self._store(key, scores)
+        self.stats_counts["reranked"] += 1
+        return self._apply(candidates, scores, limit)
+
+    def _score(self, pairs: List[Tuple[str, str]]) -> List[float]:
+        started = time.perf_counter()
+        scores = self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False).tolist()
+        per_pair = (time.perf_counter() - started) * 1000 / len(pairs)
+        if self.per_pair_ms is None:
+            self.per_pair_ms = per_pair
+        else:
+            self.per_pair_ms += LATENCY_SMOOTHING * (per_pair - self.per_pair_ms)
+        return scores
+
+    def _store(self, key: Tuple[str, Tuple[str, ...]], scores: List[float]):
+        self._cache[key] = scores
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _apply(candidates: List[Dict[str, Any]], scores: List[float], limit: int) -> List[Dict[str, Any]]:
+        ranked = sorted(zip(scores, range(len(candidates))), reverse=True)[:limit]
+        return [{**candidates[i], "rerank_score": score} for score, i in ranked]
+
+    def stats(self) -> Dict[str, Any]:
+        """Reranking counters for monitoring"""
+        return {
+            "enabled": self.enabled and self.model is not None,
+            "model": self.model_name,
+            "budget_ms": self.budget_ms,
+            "estimated_pair_ms": round(self.per_pair_ms, 3) if self.per_pair_ms is not None else None,
+            "cache_entries": len(self._cache),
+            **self.stats_counts
+        }
+
+    async def close(self):
+        self._executor.shutdown(wait=False)
+
+# Global reranker instance
+reranker = CrossEncoderReranker(
+    model_name=settings.rerank_model,
+    enabled=settings.rerank_enabled,
+    budget_ms=settings.rerank_budget_ms,
+    cache_size=settings.rerank_cache_size
+)
@@ -0,0 +1,7 @@
+import os
+import sys
+from pathlib import Path
+
+# Run from anywhere: make `app` importable and satisfy required settings
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
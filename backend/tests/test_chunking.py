@@ -0,0 +1,85 @@
+import json
+
+from app.core.chunking import DocumentChunker
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+def chunk_file(tmp_path, name: str, content: str, **kwargs):
+    path = tmp_path / name
+    path.write_text(content, encoding="utf-8")
+    chunker = DocumentChunker(count_tokens=count_words, **kwargs)
+    return list(chunker.iter_file(path, name)), content
+
+MARKDOWN = """# Bitcoin
+
+Bitcoin is a peer-to-peer electronic cash system. It needs no trusted third party.
+
+  Indented paragraph about nodes and miners.
+
+## Mining
+
+Miners extend the chain with proof of work. Each block commits to the previous one.
+Difficulty adjusts every 2016 blocks.
+
+```
+# not a heading inside a fence
+```
+"""
+
+def test_offsets_cover_chunk_text(tmp_path):
+    chunks, source = chunk_file(tmp_path, "doc.md", MARKDOWN, max_tokens=12, overlap_tokens=4)
+
+    assert chunks
+    for chunk in chunks:
+        # Blocks are rejoined with blank lines, so compare words rather than whitespace
+        assert source[chunk.start_offset:chunk.end_offset].split() == chunk.text.split()
+
+def test_chunks_stay_within_max_tokens(tmp_path):
+    sentences = " ".join(f"Sentence number {i} talks about block {i}." for i in range(60))
+    words = " ".join(f"word{i}" for i in range(500))
+    chunks, _ = chunk_file(tmp_path, "doc.txt", f"{sentences}\n\n{words}\n", max_tokens=20, overlap_tokens=5)
+
+    assert len(chunks) > 10
+    assert all(count_words(chunk.text) <= 20 for chunk in chunks)
+
+def test_word_windows_overlap(tmp_path):
+    words = " ".join(f"w{i}" for i in range(100))
+    chunks, _ = chunk_file(tmp_path, "doc.txt", words, max_tokens=30, overlap_tokens=10)
+
+    for previous, current in zip(chunks, chunks[1:]):
+        tail = previous.text.split()[-10:]
+        assert current.text.split()[:10] == tail
+        assert current.start_offset < previous.end_offset
+
+def test_chunks_never_span_headings(tmp_path):
+    chunks, _ = chunk_file(tmp_path, "doc.md", MARKDOWN, max_tokens=200, overlap_tokens=0)
+
+    assert [chunk.heading_path for chunk in chunks] == ["Bitcoin", "Bitcoin > Mining"]
+    assert "# not a heading" in chunks[-1].text
+    assert [chunk.chunk_index for chunk in chunks] == [0, 1]
+
+def test_jsonl_skips_malformed_records(tmp_path):
+    lines = [
+        json.dumps({"title": "Halving", "text": "The subsidy halves every 210000 blocks."}),
+        json.dumps([1, 2, 3]),
+        json.dumps({"text": 42}),
+        "{not json",
+        "",
+        json.dumps({"content": "Second record."})
+    ]
+    chunks, _ = chunk_file(tmp_path, "records.jsonl", "\n".join(lines) + "\n")
+
+    assert [(chunk.record, chunk.heading_path) for chunk in chunks] == [(1, "Halving"), (6, "")]
+
+def test_directory_skips_non_utf8_and_excluded(tmp_path):
+    (tmp_path / "good.md").write_text("Readable text.\n", encoding="utf-8")
+    (tmp_path / "bad.txt").write_bytes(b"caf\xe9\n")
+    (tmp_path / "glossary").mkdir()
+    (tmp_path / "glossary" / "terms.md").write_text("Excluded.\n", encoding="utf-8")
+    (tmp_path / ".cache").mkdir()
+    (tmp_path / ".cache" / "notes.txt").write_text("Hidden.\n", encoding="utf-8")
+
+    chunks = list(DocumentChunker().iter_directory(tmp_path, exclude=("glossary",)))
+
+    assert [chunk.source_path for chunk in chunks] == ["good.md"]
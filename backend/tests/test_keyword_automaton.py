@@ -0,0 +1,41 @@
+from app.core.keyword_automaton import KeywordAutomaton
+
+def automaton(*phrases):
+    keywords = KeywordAutomaton()
+    for phrase in phrases:
+        keywords.add(phrase, phrase)
+    keywords.build()
+    return keywords
+
+def found(keywords, text):
+    return sorted(value for _, _, value in keywords.find(text))
+
+def test_matches_only_whole_words():
+    keywords = automaton("node", "work")
+
+    assert found(keywords, "Run a full node.") == ["node"]
+    assert found(keywords, "Nodes and networks") == []
+    assert found(keywords, "framework") == []
+
+def test_identifiers_are_single_words():
+    keywords = automaton("op", "op_checksig")
+
+    assert found(keywords, "OP_CHECKSIG verifies a signature") == ["op_checksig"]
+    assert found(keywords, "the op code") == ["op"]
+
+def test_normalizes_case_and_punctuation():
+    keywords = automaton("proof of work", "bip-341")
+
+    assert found(keywords, "PROOF-OF-WORK, and BIP 341!") == ["bip-341", "proof of work"]
+
+def test_reports_overlapping_matches():
+    keywords = automaton("lightning", "lightning network", "network")
+
+    assert found(keywords, "the lightning network") == ["lightning", "lightning network", "network"]
+
+def test_adding_after_build_rebuilds():
+    keywords = automaton("bitcoin")
+    keywords.add("satoshi", "satoshi")
+
+    assert found(keywords, "bitcoin by satoshi") == ["bitcoin", "satoshi"]
+    assert keywords.find("") == []
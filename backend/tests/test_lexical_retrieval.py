@@ -0,0 +1,81 @@
+import pytest
+
+from app.db.lexical_index import LexicalIndex, LexicalIndexBuilder, tokenize
+from app.services.rag_service import reciprocal_rank_fusion
+
+DOCUMENTS = [
+    "Taproot was activated by BIP-341 and uses Schnorr signatures.",
+    "Proof of work secures the chain; miners search for a valid nonce.",
+    "The halving cuts the block subsidy in half every 210000 blocks.",
+    "Miners collect fees and the subsidy. Mining difficulty adjusts every 2016 blocks, "
+    "so blocks arrive roughly every ten minutes whatever the total hash rate of all miners."
+]
+
+@pytest.fixture
+def index(tmp_path):
+    builder = LexicalIndexBuilder(str(tmp_path / "lexical"))
+    for i, text in enumerate(DOCUMENTS):
+        builder.add(text, {"id": f"doc-{i}", "content": text, "source": "test"})
+    builder.finish()
+    index = LexicalIndex.open(str(tmp_path / "lexical"))
+    yield index
+    index.close()
+
+def test_tokenize_splits_and_joins_compounds():
+    assert list(tokenize("What is BIP-341?")) == ["bip-341", "bip", "341", "bip341"]
+
+def test_compound_spellings_match_each_other(index):
+    for query in ("BIP-341", "bip 341", "BIP341"):
+        assert index.search(query, limit=1)[0]["id"] == "doc-0"
+
+def test_bm25_ranks_by_term_weight(index):
+    results = index.search("halving subsidy", limit=4)
+
+    assert [r["id"] for r in results][:2] == ["doc-2", "doc-3"]
+    assert results[0]["score"] > results[1]["score"] > 0
+
+def test_shorter_document_wins_on_equal_frequency(tmp_path):
+    builder = LexicalIndexBuilder(str(tmp_path / "lexical"))
+    builder.add("mempool " + "filler " * 30, {"id": "long"})
+    builder.add("mempool policy", {"id": "short"})
+    builder.add("unrelated text", {"id": "other"})
+    builder.finish()
+    index = LexicalIndex.open(str(tmp_path / "lexical"))
+
+    assert [r["id"] for r in index.search("mempool", limit=5)] == ["short", "long"]
+    index.close()
+
+def test_unknown_or_stopword_queries_return_nothing(index):
+    assert index.search("what is the", limit=5) == []
+    assert index.search("lightning", limit=5) == []
+    assert index.search("halving", limit=0) == []
+
+def result(id_, score=1.0):
+    return {"id": id_, "content": f"content {id_}", "score": score}
+
+def test_rrf_rewards_agreement_between_rankings():
+    vector = [result("a", 0.9), result("b", 0.8), result("c", 0.7)]
+    lexical = [result("b", 12.0), result("d", 9.0), result("c", 3.0)]
+
+    fused = reciprocal_rank_fusion([vector, lexical], limit=4, k=60)
+
+    assert [r["id"] for r in fused] == ["b", "c", "a", "d"]
+    assert fused[0]["score"] == pytest.approx(1 / 62 + 1 / 61)
+    assert fused[2]["score"] == pytest.approx(1 / 61)
+
+def test_rrf_limit_and_content_keys():
+    first = [{"content": "same text", "score": 0.5}, result("x")]
+    second = [{"content": "same text", "score": 7.0}]
+
+    fused = reciprocal_rank_fusion([first, second], limit=1, k=1)
+
+    assert len(fused) == 1
+    assert fused[0]["content"] == "same text"
+    assert fused[0]["score"] == pytest.approx(1.0)
+
+def test_rrf_does_not_modify_inputs():
+    ranking = [result("a", 0.9)]
+
+    reciprocal_rank_fusion([ranking], limit=1)
+
+    assert ranking[0]["score"] == 0.9
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from app.db import local_vector_index
+from app.db.local_vector_index import EmbeddingArtifact, LocalIndexWriter, LocalVectorIndex
+
+MODEL = "test-model"
+
+def build_index(path, vectors, dtype="float32", batch=7):
+    writer = LocalIndexWriter(str(path), MODEL, dtype=dtype)
+    for start in range(0, len(vectors), batch):
+        rows = vectors[start:start + batch]
+        writer.add(rows.tolist(), [
+            {"id": f"doc-{i}", "content": f"content {i}", "content_hash": f"hash-{i}"}
+            for i in range(start, start + len(rows))
+        ])
+    writer.finish()
+    return LocalVectorIndex.open(str(path))
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).normal(size=(50, 16)).astype(np.float32)
+
+def expected_order(vectors, query):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return [f"doc-{i}" for i in np.argsort(normalized @ (query / np.linalg.norm(query)))[::-1]]
+
+def test_search_matches_brute_force(tmp_path, vectors):
+    index = build_index(tmp_path / "index", vectors)
+    query = vectors[3] + 0.1
+
+    results = index.search(query.tolist(), limit=5)
+
+    assert [r["id"] for r in results] == expected_order(vectors, query)[:5]
+    assert results[0]["content"] == "content 3"
+    assert results[0]["score"] == pytest.approx(max(r["score"] for r in results))
+    index.close()
+
+def test_float16_search_in_blocks(tmp_path, vectors, monkeypatch):
+    # Several blocks, the last one partial
+    monkeypatch.setattr(local_vector_index, "SEARCH_BLOCK_ROWS", 8)
+    index = build_index(tmp_path / "index", vectors, dtype="float16")
+    query = vectors[10]
+
+    results = index.search(query.tolist(), limit=3)
+
+    assert index.vectors.dtype == np.float16
+    assert [r["id"] for r in results] == expected_order(vectors, query)[:3]
+    assert results[0]["score"] == pytest.approx(1.0, abs=1e-2)
+    index.close()
+
+def test_limit_larger_than_index(tmp_path, vectors):
+    index = build_index(tmp_path / "index", vectors[:4])
+
+    results = index.search(vectors[0].tolist(), limit=10)
+
+    assert len(results) == 4
+    assert [r["score"] for r in results] == sorted((r["score"] for r in results), reverse=True)
+    index.close()
+
+def test_empty_index(tmp_path):
+    LocalIndexWriter(str(tmp_path / "index"), MODEL).finish()
+    index = LocalVectorIndex.open(str(tmp_path / "index"))
+
+    assert len(index) == 0
+    assert index.search([1.0, 0.0], limit=5) == []
+    assert index.stats()["documents"] == 0
+    index.close()
+
+def test_abort_keeps_existing_index(tmp_path, vectors):
+    build_index(tmp_path / "index", vectors[:5]).close()
+
+    writer = LocalIndexWriter(str(tmp_path / "index"), MODEL)
+    writer.add(vectors[5:].tolist(), [{"id": "new"}] * 45)
+    writer.abort()
+
+    index = LocalVectorIndex.open(str(tmp_path / "index"))
+    assert len(index) == 5
+    assert sorted(p.name for p in (tmp_path / "index").iterdir()) == [
+        "meta.json", "offsets.npy", "payloads.jsonl", "vectors.npy"
+    ]
+    index.close()
+
+def test_artifact_lookup_by_content_hash(tmp_path, vectors):
+    build_index(tmp_path / "index", vectors).close()
+
+    artifact = EmbeddingArtifact.open(str(tmp_path / "index"), MODEL)
+
+    assert len(artifact) == 50
+    assert artifact.get("missing") is None
+    vector = np.asarray(artifact.get("hash-7"))
+    assert vector == pytest.approx(vectors[7] / np.linalg.norm(vectors[7]), abs=1e-6)
+    artifact.close()
+    assert EmbeddingArtifact.open(str(tmp_path / "index"), "other-model") is None
+    assert EmbeddingArtifact.open(str(tmp_path / "missing"), MODEL) is None
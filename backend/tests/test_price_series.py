@@ -0,0 +1,65 @@
+import numpy as np
+
+from app.core.price_series import MAX_CACHED_VIEWS, PriceSeries, lttb_indices
+
+HOUR_MS = 3600 * 1000
+
+def make_series(points=1000):
+    timestamps = np.arange(points, dtype=np.int64) * HOUR_MS
+    prices = 30000 + 1000 * np.sin(np.linspace(0, 12, points))
+    prices[437] = 45000  # spike
+    prices[802] = 15000  # crash
+    return PriceSeries(timestamps, prices)
+
+def test_lttb_keeps_endpoints_and_extremes():
+    series = make_series()
+
+    indices = lttb_indices(series.timestamps, series.prices, 100)
+
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == len(series) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert 437 in indices and 802 in indices
+
+def test_lttb_returns_everything_when_small_enough():
+    x = np.arange(10)
+
+    assert np.array_equal(lttb_indices(x, x * 2.0, 10), x)
+    assert np.array_equal(lttb_indices(x, x * 2.0, 50), x)
+    assert np.array_equal(lttb_indices(x, x * 2.0, 2), x)
+
+def test_lttb_picks_one_point_per_bucket():
+    x = np.arange(101)
+    y = np.zeros(101)
+
+    indices = lttb_indices(x, y, 12)
+
+    # 99 inner points in 10 buckets: every kept inner point lies in its own bucket
+    edges = np.linspace(1, 100, 11).astype(int)
+    assert [int(np.searchsorted(edges, i, side="right")) for i in indices[1:-1]] == list(range(1, 11))
+
+def test_downsample_caches_views():
+    series = make_series()
+
+    view = series.downsample(200)
+
+    assert len(view) == 200
+    assert series.downsample(200) is view
+    assert series.downsample(5000) is series
+    for size in range(10, 10 + MAX_CACHED_VIEWS + 2):
+        series.downsample(size)
+    assert len(series._views) == MAX_CACHED_VIEWS
+
+def test_from_pairs_and_columns():
+    series = PriceSeries.from_pairs([[1700000000000, 35000.5], [1700003600000, 35100.25]], stale=True)
+
+    assert series.timestamps.dtype == np.int64
+    assert series.to_columns() == {"timestamps": [1700000000000, 1700003600000], "prices": [35000.5, 35100.25]}
+    assert series.downsample(3).stale
+
+def test_empty_series():
+    series = PriceSeries.from_pairs([])
+
+    assert len(series) == 0
+    assert series.downsample(100) is series
+    assert series.to_columns() == {"timestamps": [], "prices": []}
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from app.core.single_flight import SingleFlight
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flights = SingleFlight()
+        started = 0
+
+        async def fetch():
+            nonlocal started
+            started += 1
+            await asyncio.sleep(0.01)
+            return {"price": 1}
+
+        results = await asyncio.gather(*(flights.do("price", fetch) for _ in range(20)))
+        return flights, started, results
+
+    flights, started, results = run(scenario())
+
+    assert started == 1
+    assert all(result is results[0] for result in results)
+    assert flights.stats() == {"in_flight": 0, "calls": 1, "coalesced": 19, "timeouts": 0}
+
+def test_distinct_keys_run_separately():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def fetch(value):
+            await asyncio.sleep(0)
+            return value
+
+        return await asyncio.gather(flights.do("a", lambda: fetch(1)), flights.do("b", lambda: fetch(2)))
+
+    assert run(scenario()) == [1, 2]
+
+def test_exception_is_shared_and_key_is_released():
+    async def scenario():
+        flights = SingleFlight()
+        attempts = 0
+
+        async def failing():
+            nonlocal attempts
+            attempts += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(*(flights.do("k", failing) for _ in range(5)), return_exceptions=True)
+        # The failed call is not cached: the next caller starts a fresh one
+        retry = await flights.do("k", lambda: asyncio.sleep(0, result="ok"))
+        return attempts, results, retry, flights.stats()
+
+    attempts, results, retry, stats = run(scenario())
+
+    assert attempts == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert len({id(result) for result in results}) == 1
+    assert retry == "ok"
+    assert stats["in_flight"] == 0
+
+def test_waiter_timeout_leaves_shared_call_running():
+    async def scenario():
+        flights = SingleFlight(timeout=0.01)
+        finished = asyncio.Event()
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            finished.set()
+            return "done"
+
+        with pytest.raises(asyncio.TimeoutError):
+            await flights.do("k", slow)
+        # A later caller with a longer wait joins the same call
+        result = await flights.do("k", slow, timeout=1.0)
+        return result, finished.is_set(), flights.stats()
+
+    result, finished, stats = run(scenario())
+
+    assert result == "done"
+    assert finished
+    assert stats["calls"] == 1
+    assert stats["coalesced"] == 1
+    assert stats["timeouts"] == 1
+
+def test_cancelled_waiter_does_not_cancel_others():
+    async def scenario():
+        flights = SingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.02)
+            return 42
+
+        first = asyncio.create_task(flights.do("k", slow))
+        second = asyncio.create_task(flights.do("k", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second, first.cancelled()
+
+    assert run(scenario()) == (42, True)
@@ -69,8 +69,8 @@ export const priceApi = {
     return response.data
   },
 
-  getChartData: async (timeframe: string = '7d', interval: string = 'daily'): Promise<ChartData> => {
-    const response: AxiosResponse<ChartData> = await api.get(`/api/prices/chart?timeframe=${timeframe}&interval=${interval}`)
+  getChartData: async (timeframe: string = '7d', interval: string = 'daily', maxPoints: number = 500): Promise<ChartData> => {
+    const response: AxiosResponse<ChartData> = await api.get(`/api/prices/chart?timeframe=${timeframe}&interval=${interval}&max_points=${maxPoints}`)
     return response.data
   }
 }
@@ -1,5 +1,7 @@
 import { useState, useEffect, useCallback } from 'react'
 import { priceApi } from '../api'
+import { subscribeToPrices } from '../priceStream'
+import { getPriceTrend } from '../utils'
 import { PriceData, ChartData } from '../types'
 
 interface UsePricesReturn {
@@ -71,18 +73,17 @@ export function usePrices(): UsePricesReturn {
       
       // Create fallback chart data
       const now = Date.now()
-      const mockData = Array.from({ length: 7 }, (_, i) => ({
-        timestamp: now - (7 - i) * 24 * 60 * 60 * 1000,
-        price: 42000 + Math.random() * 2000,
-        date: now - (7 - i) * 24 * 60 * 60 * 1000
-      }))
+      const timestamps = Array.from({ length: 7 }, (_, i) => now - (7 - i) * 24 * 60 * 60 * 1000)
+      const prices = timestamps.map(() => 42000 + Math.random() * 2000)
 
       setChartData({
         timeframe,
         interval: 'daily',
         symbol: 'BTC',
-        data: mockData,
-        total_points: mockData.length
+        timestamps,
+        prices,
+        total_points: prices.length,
+        returned_points: prices.length
       })
     }
   }, [])
@@ -102,14 +103,39 @@ export function usePrices(): UsePricesReturn {
     refetch()
   }, [refetch])
 
-  // Auto-refresh every 60 seconds
+  // Live updates pushed by the server; poll every 60 seconds only if the stream is refused
   useEffect(() => {
-    const interval = setInterval(() => {
-      fetchCurrentPrice()
-      fetchSummary()
-    }, 60000) // 1 minute
+    let interval: ReturnType<typeof setInterval> | null = null
 
-    return () => clearInterval(interval)
+    const unsubscribe = subscribeToPrices(
+      (data) => {
+        setError(null)
+        setPrice(data)
+        setSummary((prev: any) => {
+          if (!prev) return prev
+          const change = data.price_change_percentage_24h ?? prev.price_change_24h
+          return {
+            ...prev,
+            current_price: data.current_price,
+            price_change_24h: change,
+            trend: getPriceTrend(change || 0),
+            last_updated: data.last_updated
+          }
+        })
+      },
+      () => {
+        if (interval) return
+        interval = setInterval(() => {
+          fetchCurrentPrice()
+          fetchSummary()
+        }, 60000) // 1 minute
+      }
+    )
+
+    return () => {
+      unsubscribe()
+      if (interval) clearInterval(interval)
+    }
   }, [fetchCurrentPrice, fetchSummary])
 
   return {
@@ -0,0 +1,72 @@
+import { PriceData } from './types'
+
+interface PriceSubscriber {
+  onPrice: (price: PriceData) => void
+  onClosed: () => void
+}
+
+const STREAM_URL = `${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/api/prices/stream`
+
+// One EventSource per page, shared by every usePrices() caller
+let source: EventSource | null = null
+let latest: PriceData | null = null
+const subscribers = new Set<PriceSubscriber>()
+
+function notify() {
+  if (!latest) return
+  const price = latest
+  subscribers.forEach((subscriber) => subscriber.onPrice(price))
+}
+
+function openStream() {
+  source = new EventSource(STREAM_URL)
+
+  // Full record on (re)connect
+  source.addEventListener('snapshot', (event) => {
+    latest = JSON.parse((event as MessageEvent).data)
+    notify()
+  })
+
+  // Only the fields that changed
+  source.addEventListener('price', (event) => {
+    if (!latest) return
+    latest = { ...latest, ...JSON.parse((event as MessageEvent).data) }
+    notify()
+  })
+
+  source.onerror = () => {
+    // EventSource reconnects on its own unless the server refused the stream (e.g. 503 when full)
+    if (source && source.readyState === EventSource.CLOSED) {
+      source = null
+      latest = null
+      subscribers.forEach((subscriber) => subscriber.onClosed())
+    }
+  }
+}
+
+export function subscribeToPrices(
+  onPrice: (price: PriceData) => void,
+  onClosed: () => void
+): () => void {
+  if (typeof window === 'undefined' || typeof EventSource === 'undefined') {
+    onClosed()
+    return () => {}
+  }
+
+  const subscriber = { onPrice, onClosed }
+  subscribers.add(subscriber)
+  if (!source) {
+    openStream()
+  } else if (latest) {
+    onPrice(latest)
+  }
+
+  return () => {
+    subscribers.delete(subscriber)
+    if (subscribers.size === 0 && source) {
+      source.close()
+      source = null
+      latest = null
+    }
+  }
+}
@@ -37,6 +37,7 @@ export interface PriceData {
   total_volume?: number
   price_change_percentage_24h?: number
   last_updated?: string
+  stale?: boolean
   note?: string
 }
 
@@ -47,18 +48,16 @@ export interface PriceHistory {
   total_volumes?: number[][]
 }
 
-export interface ChartDataPoint {
-  timestamp: number
-  price: number
-  date: number
-}
-
+// Columnar: timestamps[i] (ms) pairs with prices[i]
 export interface ChartData {
   timeframe: string
   interval: string
   symbol: string
-  data: ChartDataPoint[]
+  timestamps: number[]
+  prices: number[]
   total_points: number
+  returned_points: number
+  stale?: boolean
 }
 
 // News Types
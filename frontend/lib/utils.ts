@@ -85,4 +85,13 @@ export function getPriceChangeColor(change: number): string {
   if (change > 0) return 'text-green-600'
   if (change < 0) return 'text-red-600'
   return 'text-gray-600'
-}
\ No newline at end of file
+}
+
+// Same thresholds as the backend's /api/prices/summary trend
+export function getPriceTrend(change: number): string {
+  if (change > 5) return 'strongly bullish'
+  if (change > 1) return 'bullish'
+  if (change > -1) return 'sideways'
+  if (change > -5) return 'bearish'
+  return 'strongly bearish'
+}
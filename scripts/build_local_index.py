@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Local vector index build script for ChatBTC application.
+Exports the Qdrant knowledge collection into a memory-mapped in-process index.
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.append(str(Path(__file__).parent.parent / "backend"))
+
+from qdrant_client import AsyncQdrantClient
+from app.db.local_vector_index import LocalIndexWriter, LocalVectorIndex
+from app.config import settings
+
+DEFAULT_INDEX_PATH = Path(__file__).parent.parent / "data" / "bitcoin_corpus" / ".cache" / "local_index"
+
+async def build_local_index(path: Path, dtype: str, page_size: int = 1024) -> bool:
+    """Scroll every point (vector + payload) out of Qdrant into a local index."""
+    print(f"Exporting 'bitcoin_knowledge' from {settings.qdrant_url} to {path}...")
+
+    client = AsyncQdrantClient(url=settings.qdrant_url, timeout=settings.qdrant_timeout)
+    writer = LocalIndexWriter(str(path), model_name=settings.embedding_model, dtype=dtype)
+    started = time.perf_counter()
+
+    try:
+        offset = None
+        while True:
+            points, offset = await client.scroll(
+                collection_name="bitcoin_knowledge",
+                limit=page_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True
+            )
+            writer.add(
+                [point.vector for point in points],
+                [{"id": str(point.id), **point.payload} for point in points]
+            )
+            print(f"Exported {writer.count} documents")
+            if offset is None:
+                break
+
+        writer.finish()
+
+    except Exception as e:
+        print(f"❌ Export failed: {e}")
+        # Remove scratch files; any previously built index is left in place
+        writer.abort()
+        return False
+    finally:
+        await client.close()
+
+    index = LocalVectorIndex.open(str(path))
+    print(f"✅ Local index written: {index.stats()} in {time.perf_counter() - started:.2f}s")
+    index.close()
+    return True
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the in-process vector index from Qdrant")
+    parser.add_argument("--output", type=Path, default=Path(settings.local_index_path or DEFAULT_INDEX_PATH),
+                        help="Index directory (default: LOCAL_INDEX_PATH or data/bitcoin_corpus/.cache/local_index)")
+    parser.add_argument("--dtype", choices=["float16", "float32"], default=settings.local_index_dtype,
+                        help="Storage precision of the embedding matrix")
+    parser.add_argument("--page-size", type=int, default=1024,
+                        help="Points fetched per Qdrant scroll request")
+    return parser.parse_args()
+
+async def main(args: argparse.Namespace):
+    """Main build function."""
+    print("🚀 Building ChatBTC local vector index...")
+    print("-" * 50)
+
+    if not await build_local_index(args.output, args.dtype, args.page_size):
+        sys.exit(1)
+
+    print("-" * 50)
+    print(f"💡 Set LOCAL_INDEX_PATH={args.output} to use it as a fallback when Qdrant is down,")
+    print("   and VECTOR_BACKEND=local to serve from it without Qdrant")
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
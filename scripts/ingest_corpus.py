@@ -4,23 +4,77 @@ Corpus ingestion script for ChatBTC application.
 Loads Bitcoin knowledge base into Qdrant vector database.
 """
 
+import argparse
 import asyncio
 import json
 import os
 import sys
+import time
 from pathlib import Path
-from typing import List, Dict, Any
-import uuid
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
 
 # Add backend to path
 sys.path.append(str(Path(__file__).parent.parent / "backend"))
 
 from app.services.rag_service import rag_service
 from app.db.qdrant_client import vector_db
+from app.core.embedding_cache import EmbeddingCache
+from app.core.document_ids import content_hash, document_id
+from app.core.chunking import DocumentChunker
+from app.core.embedding_backends import hub_model_id
+from app.db.lexical_index import LexicalIndexBuilder
+from app.db.local_vector_index import EmbeddingArtifact, LocalIndexWriter
+from app.config import settings
+
+CORPUS_ROOT = Path(__file__).parent.parent / "data" / "bitcoin_corpus"
+CACHE_DIR = CORPUS_ROOT / ".cache"
+
+# BM25 index rebuilt on every run for hybrid retrieval (LEXICAL_INDEX_PATH)
+LEXICAL_INDEX_PATH = Path(settings.lexical_index_path) if settings.lexical_index_path else CACHE_DIR / "lexical_index"
+
+# Precomputed embeddings (.npy matrix + JSONL sidecar keyed by content hash and model),
+# reused on the next run and copyable to new environments
+EMBEDDINGS_PATH = CACHE_DIR / "embeddings"
+
+# Upper bound on document embeddings kept in memory during a run
+DOCUMENT_CACHE_SIZE = 50000
+
+# Record of which document IDs are already indexed in Qdrant
+MANIFEST_PATH = CACHE_DIR / "manifest.json"
+
+class IngestionManifest:
+    """Tracks indexed document IDs so re-runs only touch new, changed or removed documents."""
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.model_name = settings.embedding_model
+        self.documents: Dict[str, Dict[str, Any]] = {}
+    
+    def load(self):
+        if not self.path.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('model_name') != settings.embedding_model:
+            print("ℹ️ Manifest was built with a different embedding model, re-indexing everything")
+            return
+        self.documents = data.get('documents', {})
+    
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({"model_name": self.model_name, "documents": self.documents}, f, indent=2)
+    
+    def add(self, doc: Dict[str, Any]):
+        self.documents[doc['id']] = {
+            "source": doc['metadata'].get('source', ''),
+            "content_hash": content_hash(doc['content'])
+        }
 
 async def load_glossary_terms() -> List[Dict[str, Any]]:
     """Load Bitcoin glossary terms from JSON file."""
-    glossary_path = Path(__file__).parent.parent / "data" / "bitcoin_corpus" / "glossary" / "bitcoin_glossary.json"
+    glossary_path = CORPUS_ROOT / "glossary" / "bitcoin_glossary.json"
     
     print(f"Loading glossary from: {glossary_path}")
     
@@ -43,7 +97,7 @@ async def prepare_documents(terms: List[Dict[str, Any]]) -> List[Dict[str, Any]]
         content = f"Term: {term['term']}\n\nDefinition: {term['definition']}"
         
         document = {
-            "id": str(uuid.uuid4()),
+            "id": document_id(term.get('source') or 'Bitcoin Documentation', content),
             "content": content,
             "metadata": {
                 "term": term['term'],
@@ -58,8 +112,99 @@ async def prepare_documents(terms: List[Dict[str, Any]]) -> List[Dict[str, Any]]
     print(f"✅ Prepared {len(documents)} documents for ingestion")
     return documents
 
-async def ingest_documents(documents: List[Dict[str, Any]]):
-    """Ingest documents into Qdrant vector database."""
+def iter_corpus_chunks(chunker: DocumentChunker, root: Path = CORPUS_ROOT) -> Iterator[Dict[str, Any]]:
+    """
+    Stream chunk documents from markdown, text and JSONL files under the corpus root.
+    
+    Files are read incrementally, so corpora larger than memory can be ingested.
+    The glossary is excluded; it is loaded separately as whole terms.
+    """
+    for chunk in chunker.iter_directory(root, exclude=("glossary",)):
+        content = chunk.embedding_text
+        citation = chunk.source_path
+        if chunk.heading_path:
+            citation += f" - {chunk.heading_path}"
+        
+        # Offsets are part of the ID so citations stay accurate when a file is
+        # edited; shifted-but-unchanged chunks still hit the embedding artifact
+        yield {
+            "id": document_id(chunk.source_path, f"{chunk.start_offset}:{chunk.end_offset}\x00{content}"),
+            "content": content,
+            "metadata": {
+                "source": chunk.source_path,
+                "citation": citation,
+                "category": Path(chunk.source_path).parts[0] if len(Path(chunk.source_path).parts) > 1 else "",
+                "type": "document_chunk",
+                "path": chunk.source_path,
+                "heading": chunk.heading_path,
+                "chunk_index": chunk.chunk_index,
+                "start_offset": chunk.start_offset,
+                "end_offset": chunk.end_offset,
+                "record": chunk.record
+            }
+        }
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into consecutive lists of at most `size` items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# Optional metadata copied into the point payload when present
+PAYLOAD_EXTRAS = ("term", "path", "heading", "chunk_index", "start_offset", "end_offset", "record")
+
+def _payload(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the stored payload for a prepared document."""
+    metadata = doc['metadata']
+    payload = {
+        "content": doc['content'],
+        "content_hash": content_hash(doc['content']),
+        "citation": metadata.get('citation') or metadata.get('source') or 'Bitcoin Knowledge Base',
+        "source": metadata.get('source') or 'Bitcoin Documentation',
+        "category": metadata.get('category', ''),
+        "type": metadata.get('type', '')
+    }
+    for key in PAYLOAD_EXTRAS:
+        if metadata.get(key) is not None:
+            payload[key] = metadata[key]
+    
+    return payload
+
+def _to_point(doc: Dict[str, Any], vector: List[float]) -> Dict[str, Any]:
+    """Build a Qdrant point from a prepared document and its embedding."""
+    return {"id": doc['id'], "vector": vector, "payload": _payload(doc)}
+
+async def ingest_documents(
+    documents: Iterable[Dict[str, Any]],
+    encode_batch_size: int = 64,
+    upsert_batch_size: int = 256,
+    full: bool = False,
+    lexical_index: Optional[LexicalIndexBuilder] = None,
+    embeddings_path: Optional[Path] = None,
+    import_paths: Iterable[Path] = ()
+):
+    """
+    Ingest documents into Qdrant vector database.
+    
+    `documents` may be a lazy stream; it is consumed once, in batches.
+    Only documents whose content-addressed ID is not in the manifest are
+    embedded and upserted; IDs in the manifest that no longer appear in the
+    corpus are deleted afterwards. Embedding of batch N+1 runs on the
+    embedding thread while batch N is being uploaded.
+    
+    Vectors are taken from precomputed embedding artifacts (the one at
+    `embeddings_path` and any in `import_paths`) by content hash before
+    the model is run. When `embeddings_path` is given, every document's
+    vector is exported there for the next environment.
+    
+    Every document, changed or not, is also fed to `lexical_index` (if
+    given), which is rebuilt in full for BM25 retrieval.
+    """
     print("Starting document ingestion into Qdrant...")
     
     # Initialize vector database
@@ -67,7 +212,7 @@ async def ingest_documents(documents: List[Dict[str, Any]]):
     
     # Check if collection exists
     try:
-        collection_info = vector_db.client.get_collection("bitcoin_knowledge")
+        collection_info = await vector_db.client.get_collection("bitcoin_knowledge")
         print(f"✅ Found collection 'bitcoin_knowledge' with {collection_info.points_count} existing documents")
             
     except Exception as e:
@@ -75,35 +220,144 @@ async def ingest_documents(documents: List[Dict[str, Any]]):
         print("Please run setup_database.py first.")
         return False
     
-    # Store documents using the RAG service
-    success_count = 0
-    error_count = 0
+    manifest = IngestionManifest(MANIFEST_PATH)
+    if not full:
+        manifest.load()
+    if manifest.documents and not collection_info.points_count:
+        print("ℹ️ Collection is empty, ignoring manifest and re-indexing everything")
+        manifest.documents = {}
+    
+    # Identical content under different IDs (e.g. the same text in two files) is encoded
+    # once per run; the embedding artifact below is what persists vectors between runs
+    vector_db.document_cache = EmbeddingCache(
+        model_name=settings.embedding_model,
+        max_size=DOCUMENT_CACHE_SIZE,
+        normalize=False
+    )
     
-    for i, doc in enumerate(documents):
+    # Precomputed vectors by content hash, so unchanged corpora need no model at all
+    artifacts = []
+    for path in [embeddings_path, *import_paths]:
+        artifact = EmbeddingArtifact.open(str(path), settings.embedding_model) if path else None
+        if artifact:
+            print(f"📦 Loaded {len(artifact)} precomputed embeddings from {path}")
+            artifacts.append(artifact)
+    
+    exporter = LocalIndexWriter(str(embeddings_path), settings.embedding_model) if embeddings_path else None
+    
+    seen_ids = set()
+    counts = {"unchanged": 0, "success": 0, "error": 0, "precomputed": 0}
+    started = time.perf_counter()
+    
+    def pending_documents() -> Iterator[Dict[str, Any]]:
+        for doc in documents:
+            # Identical documents share an ID, so keep one of each
+            if doc['id'] in seen_ids:
+                continue
+            seen_ids.add(doc['id'])
+            if lexical_index is not None:
+                lexical_index.add(doc['content'], {"id": doc['id'], **_payload(doc)})
+            if doc['id'] in manifest.documents:
+                counts["unchanged"] += 1
+                # Unchanged documents still need a vector for the export
+                if exporter is None:
+                    continue
+            yield doc
+    
+    async def resolve_vectors(batch: List[Dict[str, Any]]) -> List[List[float]]:
+        vectors: List[Optional[List[float]]] = [None] * len(batch)
+        missing = []
+        for i, doc in enumerate(batch):
+            digest = content_hash(doc['content'])
+            for artifact in artifacts:
+                vectors[i] = artifact.get(digest)
+                if vectors[i] is not None:
+                    counts["precomputed"] += 1
+                    break
+            if vectors[i] is None:
+                missing.append(i)
+        
+        if missing:
+            if not vector_db.embedder:
+                raise RuntimeError("Embedding model not available (is RAG enabled?)")
+            encoded = await vector_db.embed_documents([batch[i]['content'] for i in missing], batch_size=encode_batch_size)
+            for i, vector in zip(missing, encoded):
+                vectors[i] = vector
+        return vectors
+    
+    async def upload(batch: List[Dict[str, Any]], vectors: List[List[float]]):
+        points = [_to_point(doc, vector) for doc, vector in zip(batch, vectors)]
+        if await vector_db.upsert_documents(points):
+            counts["success"] += len(batch)
+            for doc in batch:
+                manifest.add(doc)
+        else:
+            counts["error"] += len(batch)
+        print(f"Processed {counts['success'] + counts['error']} new documents")
+    
+    pending_upload = None
+    export_complete = True
+    for batch in _batched(pending_documents(), upsert_batch_size):
         try:
-            print(f"Processing document {i+1}/{len(documents)}: {doc['metadata']['term']}")
-            
-            # Store using RAG service
-            success = await rag_service.add_knowledge(
-                content=doc['content'],
-                citation=doc['metadata'].get('source', 'Bitcoin Knowledge Base'),
-                source=doc['metadata'].get('source', 'Bitcoin Documentation')
-            )
-            
-            if success:
-                success_count += 1
-            else:
-                error_count += 1
-            
+            # Runs while the previous batch is still uploading
+            vectors = await resolve_vectors(batch)
         except Exception as e:
-            print(f"❌ Error processing document '{doc['metadata']['term']}': {e}")
-            error_count += 1
+            print(f"❌ Error embedding batch: {e}")
+            counts["error"] += sum(1 for doc in batch if doc['id'] not in manifest.documents)
+            export_complete = False
+            continue
+        
+        if exporter is not None:
+            exporter.add(vectors, [{"id": doc['id'], **_payload(doc)} for doc in batch])
+        
+        new = [(doc, vector) for doc, vector in zip(batch, vectors) if doc['id'] not in manifest.documents]
+        if not new:
+            continue
+        if pending_upload:
+            await pending_upload
+        pending_upload = asyncio.create_task(upload([doc for doc, _ in new], [vector for _, vector in new]))
+    
+    if pending_upload:
+        await pending_upload
+    
+    if lexical_index is not None:
+        lexical_index.finish()
+        print(f"🔤 Lexical index written: {len(lexical_index)} documents, {len(lexical_index.vocabulary)} terms")
+    
+    for artifact in artifacts:
+        artifact.close()
+    if exporter is not None:
+        if export_complete:
+            exporter.finish()
+            print(f"📦 Exported {exporter.count} embeddings to {embeddings_path}")
+        else:
+            exporter.abort()
+            print(f"⚠️ Some documents could not be embedded, keeping the previous export in {embeddings_path}")
+    
+    removed_ids = [doc_id for doc_id in manifest.documents if doc_id not in seen_ids]
+    if removed_ids:
+        if await vector_db.delete_documents(removed_ids):
+            for doc_id in removed_ids:
+                del manifest.documents[doc_id]
+            print(f"🗑️ Deleted {len(removed_ids)} removed documents")
+        else:
+            print(f"❌ Failed to delete {len(removed_ids)} removed documents")
+            counts["error"] += len(removed_ids)
+    
+    elapsed = time.perf_counter() - started
+    embedded = counts["success"] + counts["error"]
+    cache_stats = vector_db.document_cache.stats()
+    manifest.save()
     
     print(f"\n📊 Ingestion Results:")
-    print(f"   ✅ Successfully ingested: {success_count} documents")
-    print(f"   ❌ Failed to ingest: {error_count} documents")
+    print(f"   ✅ Successfully ingested: {counts['success']} documents")
+    print(f"   ❌ Failed to ingest: {counts['error']} documents")
+    print(f"   ⏭️ Unchanged (skipped): {counts['unchanged']} documents")
+    print(f"   📦 Precomputed embeddings used: {counts['precomputed']}")
+    print(f"   💾 Duplicate content reused: {cache_stats['hits']} documents")
+    print(f"   ⏱️ Throughput: {embedded / elapsed if elapsed > 0 else 0:.1f} docs/s ({elapsed:.2f}s total)")
     
-    return error_count == 0
+    return counts["error"] == 0
 
 async def verify_ingestion():
     """Verify that documents were successfully ingested."""
@@ -111,7 +365,7 @@ async def verify_ingestion():
     
     try:
         # Get collection info
-        collection_info = vector_db.client.get_collection("bitcoin_knowledge")
+        collection_info = await vector_db.client.get_collection("bitcoin_knowledge")
         document_count = collection_info.points_count
         
         print(f"✅ Collection 'bitcoin_knowledge' contains {document_count} documents")
@@ -132,7 +386,49 @@ async def verify_ingestion():
         print(f"❌ Verification failed: {e}")
         return False
 
-async def main():
+def load_token_counter() -> Callable[[str], int]:
+    """
+    Token counter using the embedding model's tokenizer, loaded on its own.
+    
+    Chunk boundaries decide content hashes and IDs, so they must not depend
+    on whether the model itself is loaded (e.g. with RAG_ENABLED=false).
+    """
+    try:
+        from transformers import AutoTokenizer
+    except ImportError:
+        raise RuntimeError("Chunking requires the embedding model's tokenizer (pip install transformers)")
+    
+    tokenizer = AutoTokenizer.from_pretrained(hub_model_id(settings.embedding_model))
+    # Only counting here; silence the warning about inputs longer than the model accepts
+    tokenizer.model_max_length = sys.maxsize
+    return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Load the Bitcoin corpus into Qdrant")
+    parser.add_argument("--encode-batch-size", type=int, default=64,
+                        help="Texts per SentenceTransformer forward pass")
+    parser.add_argument("--upsert-batch-size", type=int, default=256,
+                        help="Points per Qdrant upsert request")
+    parser.add_argument("--chunk-tokens", type=int, default=200,
+                        help="Maximum tokens per document chunk")
+    parser.add_argument("--chunk-overlap", type=int, default=40,
+                        help="Tokens repeated between consecutive chunks")
+    parser.add_argument("--lexical-index", type=Path, default=LEXICAL_INDEX_PATH,
+                        help="Directory for the BM25 index used by hybrid retrieval")
+    parser.add_argument("--no-lexical-index", action="store_true",
+                        help="Skip building the BM25 index")
+    parser.add_argument("--embeddings", type=Path, default=EMBEDDINGS_PATH,
+                        help="Embedding artifact to reuse vectors from and export every vector to")
+    parser.add_argument("--import-embeddings", type=Path, action="append", default=[],
+                        help="Additional embedding artifact to reuse vectors from (repeatable)")
+    parser.add_argument("--no-export-embeddings", action="store_true",
+                        help="Do not write the embedding artifact")
+    parser.add_argument("--full", action="store_true",
+                        help="Ignore the manifest and re-index every document")
+    return parser.parse_args()
+
+async def main(args: argparse.Namespace):
     """Main ingestion function."""
     print("🚀 Starting ChatBTC corpus ingestion...")
     print("-" * 50)
@@ -144,8 +440,23 @@ async def main():
         # Prepare documents
         documents = await prepare_documents(terms)
         
+        # Stream chunks of long-form documents (whitepaper, BIPs, ...)
+        chunker = DocumentChunker(
+            max_tokens=args.chunk_tokens,
+            overlap_tokens=args.chunk_overlap,
+            count_tokens=load_token_counter()
+        )
+        
         # Ingest into vector database
-        success = await ingest_documents(documents)
+        success = await ingest_documents(
+            chain(documents, iter_corpus_chunks(chunker)),
+            encode_batch_size=args.encode_batch_size,
+            upsert_batch_size=args.upsert_batch_size,
+            full=args.full,
+            lexical_index=None if args.no_lexical_index else LexicalIndexBuilder(str(args.lexical_index)),
+            embeddings_path=None if args.no_export_embeddings else args.embeddings,
+            import_paths=args.import_embeddings + ([args.embeddings] if args.no_export_embeddings else [])
+        )
         
         if success:
             # Verify ingestion
@@ -164,4 +475,4 @@ async def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main(parse_args()))
\ No newline at end of file
@@ -47,7 +47,7 @@ async def setup_postgresql():
         await postgres_client.execute_command("""
             CREATE TABLE IF NOT EXISTS chat_messages (
                 id SERIAL PRIMARY KEY,
-                session_id INTEGER REFERENCES chat_sessions(id),
+                session_id VARCHAR(255) NOT NULL,  -- client-chosen id, e.g. 'default'
                 content TEXT NOT NULL,
                 role VARCHAR(50) NOT NULL,  -- 'user' or 'assistant'
                 citations JSONB,
@@ -55,15 +55,82 @@ async def setup_postgresql():
             )
         """)
         
+        # Older databases created session_id as an integer foreign key, which
+        # rejects the string ids the API receives (asyncpg does not coerce them)
+        await postgres_client.execute_command(
+            "ALTER TABLE chat_messages DROP CONSTRAINT IF EXISTS chat_messages_session_id_fkey"
+        )
+        await postgres_client.execute_command(
+            "ALTER TABLE chat_messages ALTER COLUMN session_id TYPE VARCHAR(255) USING session_id::text"
+        )
+        await postgres_client.execute_command("""
+            CREATE INDEX IF NOT EXISTS idx_chat_messages_session_created
+            ON chat_messages (session_id, created_at)
+        """)
+        
+        # Primary key doubles as the time index for range queries per series
+        await postgres_client.execute_command("""
+            CREATE TABLE IF NOT EXISTS price_history (
+                symbol VARCHAR(20) NOT NULL,
+                resolution VARCHAR(10) NOT NULL,  -- 'daily' or 'hourly'
+                bucket_ms BIGINT NOT NULL,  -- start of the day/hour the point falls in
+                timestamp_ms BIGINT NOT NULL,
+                price DOUBLE PRECISION NOT NULL,
+                market_cap DOUBLE PRECISION,
+                total_volume DOUBLE PRECISION,
+                PRIMARY KEY (symbol, resolution, bucket_ms)
+            )
+        """)
+        
         print("✅ PostgreSQL tables created successfully")
         return True
     else:
         print("❌ Failed to create PostgreSQL tables")
         return False
 
+# Payload fields filtered on at query time
+PAYLOAD_INDEX_FIELDS = ("source", "category")
+
+def quantization_config():
+    """Quantization settings for the knowledge collection, or None for full precision."""
+    from qdrant_client.http import models
+    
+    if settings.qdrant_quantization == "scalar":
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=0.99,
+                always_ram=settings.qdrant_quantization_always_ram
+            )
+        )
+    if settings.qdrant_quantization == "binary":
+        return models.BinaryQuantization(
+            binary=models.BinaryQuantizationConfig(always_ram=settings.qdrant_quantization_always_ram)
+        )
+    if settings.qdrant_quantization != "none":
+        raise ValueError(f"Unknown QDRANT_QUANTIZATION '{settings.qdrant_quantization}' (use none, scalar or binary)")
+    return None
+
+async def ensure_payload_indexes(client):
+    """Create keyword indexes on filtered payload fields (no-op if they exist)."""
+    from qdrant_client.http import models
+    
+    for field_name in PAYLOAD_INDEX_FIELDS:
+        await client.create_payload_index(
+            collection_name="bitcoin_knowledge",
+            field_name=field_name,
+            field_schema=models.PayloadSchemaType.KEYWORD
+        )
+    print(f"✅ Payload indexes on {', '.join(PAYLOAD_INDEX_FIELDS)}")
+
 async def setup_qdrant():
     """Initialize Qdrant vector database collections."""
     print("Setting up Qdrant vector database...")
+    print(
+        f"Collection layout: quantization={settings.qdrant_quantization}, "
+        f"vectors_on_disk={settings.qdrant_vectors_on_disk}, "
+        f"hnsw m={settings.qdrant_hnsw_m} ef_construct={settings.qdrant_hnsw_ef_construct}"
+    )
     
     qdrant_client = QdrantVectorDB()
     await qdrant_client.initialize()
@@ -72,22 +139,42 @@ async def setup_qdrant():
     try:
         from qdrant_client.http import models
         
+        hnsw_config = models.HnswConfigDiff(
+            m=settings.qdrant_hnsw_m,
+            ef_construct=settings.qdrant_hnsw_ef_construct
+        )
+        
         # Check if collection exists
         try:
-            collection_info = qdrant_client.client.get_collection("bitcoin_knowledge")
-            print("ℹ️ Qdrant 'bitcoin_knowledge' collection already exists")
-            return True
+            collection_info = await qdrant_client.client.get_collection("bitcoin_knowledge")
         except:
+            collection_info = None
+        
+        if collection_info:
+            # Bring storage, index and quantization settings in line; Qdrant rebuilds in the background
+            await qdrant_client.client.update_collection(
+                collection_name="bitcoin_knowledge",
+                vectors_config={"": models.VectorParamsDiff(on_disk=settings.qdrant_vectors_on_disk)},
+                hnsw_config=hnsw_config,
+                quantization_config=quantization_config() or models.Disabled.DISABLED
+            )
+            print("ℹ️ Qdrant 'bitcoin_knowledge' collection already exists, updated its storage, HNSW and quantization settings")
+        else:
             # Collection doesn't exist, create it
-            qdrant_client.client.create_collection(
+            await qdrant_client.client.create_collection(
                 collection_name="bitcoin_knowledge",
                 vectors_config=models.VectorParams(
                     size=384,  # sentence-transformers/all-MiniLM-L6-v2 dimension
-                    distance=models.Distance.COSINE
-                )
+                    distance=models.Distance.COSINE,
+                    on_disk=settings.qdrant_vectors_on_disk
+                ),
+                hnsw_config=hnsw_config,
+                quantization_config=quantization_config()
             )
             print("✅ Qdrant 'bitcoin_knowledge' collection created successfully")
-            return True
+        
+        await ensure_payload_indexes(qdrant_client.client)
+        return True
             
     except Exception as e:
         print(f"❌ Error creating Qdrant collection: {e}")